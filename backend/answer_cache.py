@@ -0,0 +1,151 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+import config
+
+
+def normalize_text(text) -> str:
+    """
+    Lowercase, drop punctuation and collapse whitespace so cosmetic differences
+    between forms (asterisks, trailing colons, double spaces) do not change a signature.
+    """
+    if text is None:
+        return ''
+    if isinstance(text, list):
+        text = ' '.join(str(item) for item in text)
+    text = re.sub(r'[^\w\s]', ' ', str(text).lower())
+    return ' '.join(text.split())
+
+
+def field_signature(tag: dict) -> str:
+    """
+    Build a stable signature for a field from its HTMLHandler.tags_to_list entry.
+    Volatile attributes such as ids and typed values are ignored; radio buttons and
+    checkboxes keep their value since it identifies the option.
+    """
+    input_type = normalize_text(tag.get('type'))
+    signature = {
+        'tag_type': tag.get('tag_type'),
+        'type': input_type,
+        'label': normalize_text(tag.get('aria-label')),
+        'text_above_htmltag': normalize_text(tag.get('text_above_htmltag')),
+        'name': normalize_text(tag.get('name')),
+        'autocomplete': normalize_text(tag.get('autocomplete')),
+        'options': sorted(
+            (normalize_text(option.get('value')), normalize_text(option.get('text')))
+            for option in tag.get('select_options') or []
+        ),
+    }
+    if input_type in ('radio', 'checkbox'):
+        signature['value'] = normalize_text(tag.get('value'))
+    return hashlib.sha256(json.dumps(signature, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def context_hash(context_doc: str) -> str:
+    return hashlib.sha256((context_doc or '').encode('utf-8')).hexdigest()
+
+
+class AnswerCache:
+    """
+    SQLite-backed cache of relevance answers keyed by (field signature, context hash).
+    Entries expire `ttl_seconds` after they were written, and the least recently used
+    entries are evicted once more than `max_entries` are stored.
+    Separate caches can share one database file through different `table` names.
+    """
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int, table: str = 'answers'):
+        self.path = path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {table} ('
+            'signature TEXT NOT NULL, context_hash TEXT NOT NULL, answer TEXT NOT NULL, '
+            'created_at REAL NOT NULL, last_used_at REAL NOT NULL, '
+            'PRIMARY KEY (signature, context_hash))'
+        )
+        self.conn.execute(f'CREATE INDEX IF NOT EXISTS {table}_last_used ON {table} (last_used_at)')
+        self.conn.commit()
+
+    def get(self, signature, ctx_hash):
+        return self.get_many([signature], ctx_hash).get(signature)
+
+    def put(self, signature, answer, ctx_hash):
+        self.put_many({signature: answer}, ctx_hash)
+
+    def get_many(self, signatures, ctx_hash):
+        """
+        Look up answers for several signatures at once.
+        :return: Dictionary of signature -> answer dict for the signatures that hit.
+        """
+        signatures = list(set(signatures))
+        if not signatures:
+            return {}
+        now = time.time()
+        placeholders = ','.join('?' * len(signatures))
+        with self.lock:
+            rows = self.conn.execute(
+                f'SELECT signature, answer FROM {self.table} WHERE context_hash = ? AND created_at >= ? '
+                f'AND signature IN ({placeholders})',
+                [ctx_hash, now - self.ttl_seconds, *signatures],
+            ).fetchall()
+            if rows:
+                self.conn.executemany(
+                    f'UPDATE {self.table} SET last_used_at = ? WHERE signature = ? AND context_hash = ?',
+                    [(now, signature, ctx_hash) for signature, _ in rows],
+                )
+                self.conn.commit()
+        return {signature: json.loads(answer) for signature, answer in rows}
+
+    def put_many(self, answers, ctx_hash):
+        """
+        Store answers and apply TTL and LRU eviction.
+        :param answers: Dictionary of signature -> answer dict.
+        """
+        if not answers:
+            return
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                f'INSERT OR REPLACE INTO {self.table} (signature, context_hash, answer, created_at, last_used_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(signature, ctx_hash, json.dumps(answer), now, now) for signature, answer in answers.items()],
+            )
+            self.conn.execute(f'DELETE FROM {self.table} WHERE created_at < ?', (now - self.ttl_seconds,))
+            self.conn.execute(
+                f'DELETE FROM {self.table} WHERE rowid IN ('
+                f'SELECT rowid FROM {self.table} ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,),
+            )
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute(f'DELETE FROM {self.table}')
+            self.conn.commit()
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    """
+    Return the process-wide answer cache, or None when caching is disabled.
+    """
+    global _answer_cache
+    if not config.ANSWER_CACHE_ENABLED:
+        return None
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = AnswerCache(
+                config.ANSWER_CACHE_PATH,
+                config.ANSWER_CACHE_TTL_SECONDS,
+                config.ANSWER_CACHE_MAX_ENTRIES,
+            )
+        return _answer_cache
@@ -1,44 +1,111 @@
-from flask import Flask,request, jsonify
+from flask import Flask,request, jsonify, Response
 from flask_socketio import SocketIO, emit, send
 from bs4 import BeautifulSoup
 from global_state import globalStateMgr
-from workflow_runner import WorkflowRunner
+from workflow_runner import WorkflowRunner, WorkCancelled
+from job_scheduler import get_job_scheduler
 from socketio_instance import socketio
 from flask_restful import Api
 from llm import LLMHandler
 from html_handler import HTMLHandler
+from transport import PayloadTooLarge, UnsupportedEncoding, read_json_body, read_new_work_html, supported_encodings
+from metrics import JOB_QUEUE_DEPTH, STATE_BYTES, STATE_RUNNERS, log_event, registry
+import config
+import logging
 import traceback
 
+logging.basicConfig(level=config.LOG_LEVEL, format='%(asctime)s %(levelname)s %(name)s %(message)s')
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your_secret_key!'
 socketio.init_app(app)
 
+
+def emit_job_status(job, status):
+    socketio.emit("job_status", {'work_id': job.work_id, 'status': status}, to=job.client_id)
+    if status == 'cancelled':
+        globalStateMgr.remove_workflow_runner(job.work_id)
+
+
+jobScheduler = get_job_scheduler(on_status=emit_job_status)
+
 @socketio.on('connect')
 def test_connect():
-    print('Client connected')
+    log_event(logger, logging.INFO, 'client_connected', sid=request.sid)
+    # Clients compress new_work and select_option payloads only with an encoding listed here
+    emit('server_capabilities', {'encodings': supported_encodings()})
     
 
 @socketio.on('disconnect')
 def test_disconnect():
-    print('Client disconnected')
+    cancelled = jobScheduler.cancel_client(request.sid)
+    log_event(logger, logging.INFO, 'client_disconnected', sid=request.sid, cancelled_jobs=cancelled)
+
+@socketio.on('cancel_work')
+def cancel_work(data):
+    """Sent by the extension when the tab of a work item is closed."""
+    if not jobScheduler.cancel(data.get('work_id')):
+        globalStateMgr.remove_workflow_runner(data.get('work_id'))
+
+@socketio.on('fill_batch_result')
+def fill_batch_result(data):
+    """Sent by the extension after a fill batch with the actions it could not apply."""
+    log_event(logger, logging.WARNING, 'fill_batch_failed_actions',
+              work_id=data.get('work_id'), failed=data.get('failed') or [])
+
+def run_work(wr, data, sid):
+    """
+    Runs a workflow on a scheduler worker and reports the outcome to the client that sent it.
+    """
+    try:
+        wr.progress_callback = lambda stage, done, total: socketio.emit(
+            "job_status", {'work_id': wr.work_id, 'status': 'running', 'stage': stage, 'done': done, 'total': total}, to=sid
+        )
+        wr.run()
+        socketio.emit("end-process", data, to=sid)
+    except WorkCancelled:
+        log_event(logger, logging.INFO, 'work_cancelled', work_id=wr.work_id)
+    except Exception as e:
+        error_data = {
+            'work_id': data.get('work_id'),
+            'error': 'Internal server error',
+            'details': str(e),
+            'traceback': traceback.format_exc()
+        }
+        socketio.emit("end-process", error_data, to=sid)
+        raise
+    finally:
+        # The runner compacted itself when run() returned
+        globalStateMgr.refresh_size(wr.work_id)
 
 @socketio.on('new_work')
 def new_work(data):
     try:
-        print('new work received')
-        print('data', data)
+        # Compressed clients send the page as a binary attachment; it is decoded once here
+        rendered_html = read_new_work_html(data)
+        data = {k: v for k, v in data.items() if k not in ('renderedHTML', 'renderedHTMLCompressed', 'encoding')}
+        log_event(logger, logging.INFO, 'new_work', work_id=data.get('work_id'), html_chars=len(rendered_html or ''))
         
         # Validate required data
-        if not data.get('work_id') or not data.get('renderedHTML'):
+        if not data.get('work_id') or not rendered_html:
             raise ValueError("Missing required fields: work_id or renderedHTML")
             
-        wr = WorkflowRunner(data['work_id'], data['renderedHTML'])
+        wr = WorkflowRunner(data['work_id'], rendered_html)
         wr.set_context_from_file("./context.txt")
+        wr.queued = True
         globalStateMgr.add_workflow_runner(data['work_id'], wr)
-        wr.run()
-        
-        # Success response
-        emit("end-process", data)
+        sid = request.sid
+        # The pipeline runs on a worker; this handler only acknowledges the work
+        if not jobScheduler.submit(data['work_id'], sid, lambda: run_work(wr, data, sid), cancel=wr.cancel):
+            globalStateMgr.remove_workflow_runner(data['work_id'])
+            emit("end-process", {
+                'work_id': data['work_id'],
+                'error': 'Server busy',
+                'details': f'{jobScheduler.max_queue_depth} jobs are already waiting, try again later'
+            })
+            return {'status': 'rejected'}
+        return {'status': 'accepted', 'queue_depth': jobScheduler.queue_depth()}
         
     except FileNotFoundError as e:
         error_data = {
@@ -64,21 +131,39 @@ def new_work(data):
             'traceback': traceback.format_exc()
         }
         emit("end-process", error_data)
-        print(f"Error in new_work: {traceback.format_exc()}")
+        log_event(logger, logging.ERROR, 'new_work_failed', work_id=data.get('work_id'), traceback=error_data['traceback'])
 
 
 @app.route('/api/select_option', methods=['POST'])
 def get_option_to_select():
-    data = request.get_json()
+    try:
+        data = read_json_body(request)
+    except UnsupportedEncoding as e:
+        return jsonify({'status': 'unsuccessful', 'error': str(e), 'encodings': supported_encodings()}), 415
+    except PayloadTooLarge as e:
+        return jsonify({'status': 'unsuccessful', 'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'status': 'unsuccessful', 'error': str(e)}), 400
     wr = globalStateMgr.get_workflow_runner(data['work_id'])
     if wr == None:
         return jsonify({'status': 'unsuccessful'})
-    option_text = LLMHandler().select_drop_down(wr.context,data['description'],data['options'])
-    new_html_handler = HTMLHandler(data['newHtml'])
-    element_to_select = new_html_handler.get_element_with_text(option_text)
+    if data.get('newSubtree') is None and data.get('newHtml') is None:
+        return jsonify({'status': 'unsuccessful'})
+    option_text = LLMHandler().select_drop_down(wr.context,data['description'],data['options'],answer=data.get('answer'))
+    # Clients send only the subtree that appeared after the click; full pages are still accepted
+    element_to_select = wr.find_option_element(option_text, new_subtree=data.get('newSubtree'), new_html=data.get('newHtml'))
+    globalStateMgr.refresh_size(data['work_id'])
     if(element_to_select==None):
         return jsonify({'status': 'unsuccessful'})
     return jsonify({'status': 'success', 'element_to_select': element_to_select,'work_id':data['work_id']})
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Stage latencies, LLM tokens, cache lookups and queue/state sizes in the Prometheus text format."""
+    JOB_QUEUE_DEPTH.set(jobScheduler.queue_depth())
+    STATE_RUNNERS.set(len(globalStateMgr.list_work_ids()))
+    STATE_BYTES.set(globalStateMgr.total_bytes())
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
   socketio.run(app, debug=True,port=5001)
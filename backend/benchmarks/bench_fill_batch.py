@@ -0,0 +1,80 @@
+"""
+Compares per-field fill events with the batched 'fill_batch' event for a form with 50 fields to fill.
+Reports server-side emit time, socket frames and payload bytes; each frame is one extra
+websocket message and one extra task on the extension's fill queue.
+
+Usage (from the backend directory):
+    python benchmarks/bench_fill_batch.py [--fields 50]
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm
+import workflow_runner
+from html_handler import HTMLHandler
+from workflow_runner import WorkflowRunner
+from benchmarks.fake_chat_model import FakeChatModel
+from benchmarks.fake_socket import FakeSocketSink
+from benchmarks.pages import synthetic_form_page
+
+GROUPS = {'text': 'input text', 'radio': 'radiobutton', 'checkbox': 'checkbox', 'select': 'dropdown', 'textarea': 'textarea'}
+
+
+def planned_tags(num_fields):
+    """Tags as run_step_1 would return them, with every field relevant and answered."""
+    tags = HTMLHandler(synthetic_form_page(num_fields, 0)).tags_to_list()
+    for tag in tags:
+        kind = tag['tag_type'] if tag['tag_type'] in ('select', 'textarea') else tag.get('type', 'text')
+        tag.update({
+            'general_input_group': 'dropdown' if tag.get('aria-haspopup') else GROUPS.get(kind, 'button'),
+            'is_relevant_or_required': 'no' if kind == 'submit' else 'yes',
+            'text_value': f"value for {tag['key']}",
+            'select_option_value': 'Canada' if kind == 'select' else None,
+            'is_filled': 'no',
+            'description': tag['key'],
+        })
+    return tags
+
+
+def run_emit(tags, batched):
+    sink = FakeSocketSink()
+    workflow_runner.socketio = sink
+    runner = WorkflowRunner('bench', '')
+    start = time.perf_counter()
+    if batched:
+        runner._emit_fill_batch(tags)
+    else:
+        runner._emit_fill_dropdowns(tags)
+        runner._emit_fill_text_inputs(tags)
+        runner._emit_fill_radiobtns(tags)
+        runner._emit_fill_checkboxes(tags)
+        runner._emit_fill_select_dropdown(tags)
+    return time.perf_counter() - start, sink
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fields", type=int, default=50)
+    args = parser.parse_args()
+
+    llm._shared_llms[llm.config.LLM_MODEL_NAME] = FakeChatModel(latency=0, content='Canada')
+    tags = planned_tags(args.fields)
+    sys.stdout = open(os.devnull, 'w')  # silence per-field prints
+    per_field_time, per_field = run_emit(copy.deepcopy(tags), batched=False)
+    batch_time, batch = run_emit(copy.deepcopy(tags), batched=True)
+    sys.stdout = sys.__stdout__
+
+    actions = batch.events('fill_batch')[0]['data']['actions']
+    assert len(actions) == len(per_field.frames), "batch and per-field paths fill different fields"
+    print(f"{len(tags)} tags, {len(actions)} fills")
+    print(f"per-field events: {len(per_field.frames):3d} frames {per_field.total_bytes():7d} bytes  emit {per_field_time * 1000:6.2f} ms")
+    print(f"fill_batch:       {len(batch.frames):3d} frames {batch.total_bytes():7d} bytes  emit {batch_time * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
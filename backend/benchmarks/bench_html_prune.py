@@ -0,0 +1,86 @@
+"""
+Measures the html pre-pruner: characters and UTF-8 bytes received versus left to parse, prune time,
+and parse time with and without pruning for each parser backend. Also checks that pruning keeps
+every form control with the same attributes and options, and counts the tags whose text window
+changed (only text from the dropped parts, such as script code, may leave a window).
+
+Usage (from the backend directory):
+    python benchmarks/bench_html_prune.py [--pages DIR_WITH_SAVED_HTML] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_handler import HTMLHandler
+from html_pruner import prune_html
+from benchmarks.pages import load_pages, synthetic_form_page
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+TEXT_WINDOW_FIELDS = ('text_above_htmltag', 'text_below_htmltag')
+# Custom elements whose names start with a pruned tag name hold form controls and must be kept.
+CUSTOM_ELEMENTS_PAGE = """<html><body><form>
+<style-guide><label for="name">Full name</label><input id="name" name="name" type="text"></style-guide>
+<script-loader data-src="app.js"><label for="email">Email</label><input id="email" type="email"></script-loader>
+<svg-icon name="phone"></svg-icon><label for="phone">Phone</label><input id="phone" type="tel">
+<svg viewBox="0 0 8 8"><svg-icon></svg-icon><path d="M0 0h8v8z"/></svg>
+<iframe-host><select id="country"><option>United States</option><option>Canada</option></select></iframe-host>
+<script>var x = "<input id='fake'>";</script>
+</form></body></html>"""
+
+
+def best_time(repeat, function):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def controls(tags):
+    return [{k: v for k, v in tag.items() if k not in TEXT_WINDOW_FIELDS} for tag in tags]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", help="directory of saved rendered pages (*.html); defaults to synthetic pages and the corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the best is reported")
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = load_pages(args.pages)
+    else:
+        pages = load_pages() + load_pages(CORPUS_DIR)
+        pages.append(("synthetic-60f-2000b-100img", synthetic_form_page(60, 2000, inline_images=100)))
+        pages.append(("custom-elements", CUSTOM_ELEMENTS_PAGE))
+
+    failures = 0
+    print(f"{'page':30s} {'KB in':>8s} {'KB parsed':>9s} {'saved':>6s} {'prune ms':>8s} {'backend':12s} {'parse ms':>8s} {'pruned ms':>9s} {'speedup':>7s}  tags")
+    for name, html in pages:
+        prune_time, (pruned, stats) = best_time(args.repeat, lambda: prune_html(html))
+        bytes_in, bytes_out = len(html.encode('utf-8')), len(pruned.encode('utf-8'))
+        for backend in HTMLHandler.parser_backends:
+            parse_time, full = best_time(args.repeat, lambda: HTMLHandler(html, parser=backend, prune=False))
+            pruned_time, pruned_handler = best_time(args.repeat, lambda: HTMLHandler(html, parser=backend, prune=True))
+            full_tags, pruned_tags = full.tags_to_list(), pruned_handler.tags_to_list()
+            same_controls = controls(full_tags) == controls(pruned_tags)
+            windows_changed = sum(a != b for a, b in zip(full_tags, pruned_tags))
+            failures += not same_controls
+            print(
+                f"{name:30s} {bytes_in / 1024:8.1f} {bytes_out / 1024:9.1f} {1 - bytes_out / bytes_in:6.0%} "
+                f"{prune_time * 1000:8.1f} {pruned_handler.parser:12s} {parse_time * 1000:8.1f} {pruned_time * 1000:9.1f} "
+                f"{parse_time / pruned_time:6.2f}x  {'same controls' if same_controls else 'CONTROLS DIFFER'}, "
+                f"{windows_changed} text window(s) changed"
+            )
+        dropped = {kind: count for kind, count in stats.items() if not kind.startswith('chars_')}
+        print(f"{'':30s} dropped {dropped}")
+    if failures:
+        sys.exit(f"{failures} page/backend pair(s) lost or changed form controls when pruned")
+
+
+if __name__ == "__main__":
+    main()
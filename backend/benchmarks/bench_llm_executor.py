@@ -0,0 +1,87 @@
+"""
+Compares the async chunk executor in LLMHandler with the previous
+multiprocessing fan-out, using a stubbed chat model with fixed latency.
+
+Usage (from the backend directory):
+    python benchmarks/bench_llm_executor.py --tags 60 --latency 0.3
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm import LLMHandler, split_into_chunks
+from structured_models.input_tag_summary import InputTagSummaryList
+from langchain_core.prompts import ChatPromptTemplate
+from benchmarks.fake_chat_model import FakeChatModel
+
+PROMPT_TEMPLATE = ChatPromptTemplate.from_messages([("human", "{input_tags}")])
+
+
+def make_tags(count):
+    return [{"key": f"input_{i}", "type": "text", "idx": i, "tag_type": "input"} for i in range(count)]
+
+
+def legacy_process_chunk(chunk, schema, queue, latency):
+    # Mirrors the old per-process worker: a fresh client per process, result shipped through a Queue.
+    structured_llm = FakeChatModel(latency=latency).with_structured_output(schema=schema)
+    prompt = PROMPT_TEMPLATE.invoke({"input_tags": chunk})
+    queue.put(structured_llm.invoke(prompt).tags)
+
+
+def run_legacy(tags, num_chunks, latency, start_method):
+    context = multiprocessing.get_context(start_method)
+    chunks = split_into_chunks(tags, num_chunks)
+    queues = [context.Queue() for _ in chunks]
+    processes = [
+        context.Process(target=legacy_process_chunk, args=(chunk, InputTagSummaryList, queue, latency))
+        for chunk, queue in zip(chunks, queues)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return [item for queue in queues for item in queue.get()]
+
+
+def run_async(tags, num_chunks, latency, max_concurrency):
+    handler = LLMHandler(llm=FakeChatModel(latency=latency), max_concurrency=max_concurrency)
+    return handler._run_in_parallel(tags, PROMPT_TEMPLATE, "input_tags", InputTagSummaryList, {}, num_chunks=num_chunks)
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tags", type=int, default=60)
+    parser.add_argument("--chunks", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--start-method", default="spawn", choices=multiprocessing.get_all_start_methods())
+    args = parser.parse_args()
+
+    tags = make_tags(args.tags)
+    legacy_time, legacy_result = timed(lambda: run_legacy(tags, args.chunks, args.latency, args.start_method), args.repeat)
+    async_time, async_result = timed(lambda: run_async(tags, args.chunks, args.latency, args.max_concurrency), args.repeat)
+
+    assert [tag.key for tag in async_result] == [tag["key"] for tag in tags], "async executor lost or reordered tags"
+    print(f"tags={args.tags} chunks={args.chunks} latency={args.latency}s start_method={args.start_method}")
+    print(f"multiprocessing: {legacy_time * 1000:8.1f} ms ({len(legacy_result)} results)")
+    print(f"async executor:  {async_time * 1000:8.1f} ms ({len(async_result)} results)")
+    print(f"overhead saved:  {(legacy_time - async_time) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Exercises the LLM gateway offline with a fake model that fails every n-th call with a 429:
+runs the relevance stage for a synthetic form and reports calls, retries, failed chunks and
+time spent waiting for the token/request budget.
+
+Usage (from the backend directory):
+    python benchmarks/bench_llm_gateway.py [--fields 80] [--rate-limit-every 3] [--tpm 8000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from llm import LLMHandler
+from llm_gateway import LLMGateway
+from html_handler import HTMLHandler
+from benchmarks.fake_chat_model import FakeChatModel
+from benchmarks.pages import synthetic_form_page
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fields", type=int, default=80)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake LLM call")
+    parser.add_argument("--rate-limit-every", type=int, default=3, help="fail every n-th call with a 429 (0 = never)")
+    parser.add_argument("--tpm", type=int, default=8000, help="tokens per minute admitted by the gateway")
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute admitted by the gateway")
+    args = parser.parse_args()
+
+    config.ANSWER_CACHE_ENABLED = False
+    config.LLM_BACKOFF_BASE_SECONDS = 0.1
+    tags = HTMLHandler(synthetic_form_page(args.fields, 0)).tags_to_list()
+    context_doc = open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "context.txt")).read()
+
+    for label, rate_limit_every in (("no errors", 0), (f"429 every {args.rate_limit_every} calls", args.rate_limit_every)):
+        fake = FakeChatModel(latency=args.latency, rate_limit_every=rate_limit_every)
+        handler = LLMHandler(llm=fake)
+        handler.gateway = LLMGateway(fake, tokens_per_minute=args.tpm, requests_per_minute=args.rpm)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            answers = handler.evaluate_input_relevance(context_doc, tags)
+            elapsed = time.perf_counter() - start
+        stats = handler.gateway.stats()
+        print(
+            f"{label:20s} {len(answers):3d}/{len(tags)} tags answered in {elapsed:5.2f} s  "
+            f"{stats['calls']} attempts, {stats['retries']} retries, {stats['failures']} failed  "
+            f"budget wait total {stats['queue_wait_seconds']:.2f} s, max {stats['max_queue_wait_seconds']:.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Load test for the new_work socket handler: several clients submit work at once and the test
+reports how long each client waited for its acknowledgement and for its end-process event.
+The serialized baseline runs the same workflows one after another, as the handler did when it
+called wr.run() inline.
+
+Uses a fake chat model, so only the scheduling is measured, and Flask-SocketIO test clients.
+
+Usage (from the backend directory):
+    python benchmarks/bench_new_work_load.py [--clients 8] [--latency 0.3]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import llm
+from benchmarks.fake_chat_model import FakeChatModel
+from benchmarks.pages import synthetic_form_page
+
+
+def wait_for_end(client, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if any(event['name'] == 'end-process' for event in client.get_received()):
+            return time.perf_counter()
+        time.sleep(0.01)
+    raise TimeoutError("no end-process received")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds per fake LLM call")
+    parser.add_argument("--fields", type=int, default=20)
+    args = parser.parse_args()
+
+    config.PLAN_CACHE_ENABLED = False
+    config.ANSWER_CACHE_ENABLED = False
+    llm._shared_llms[config.LLM_MODEL_NAME] = FakeChatModel(latency=args.latency)
+    import app
+    from workflow_runner import WorkflowRunner
+
+    html = synthetic_form_page(args.fields, 0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for i in range(args.clients):
+            wr = WorkflowRunner(f'serial-{i}', html)
+            wr.set_context_from_file("./context.txt")
+            wr.run()
+        serial_time = time.perf_counter() - start
+
+        clients = [app.socketio.test_client(app.app) for _ in range(args.clients)]
+        start = time.perf_counter()
+        acks = []
+        for i, client in enumerate(clients):
+            client.emit('new_work', {'work_id': f'load-{i}', 'renderedHTML': html}, callback=True)
+            acks.append(time.perf_counter() - start)
+        ends = [wait_for_end(client, timeout=60 + serial_time * 2) - start for client in clients]
+
+    print(f"{args.clients} clients, {config.JOB_WORKERS} workers, fake LLM latency {args.latency}s")
+    print(f"serialized (inline wr.run):  all done after {serial_time:6.2f} s")
+    print(f"scheduled:                   all acknowledged after {max(acks) * 1000:6.1f} ms, all done after {max(ends):6.2f} s")
+    print(f"speedup {serial_time / max(ends):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares resolving native <select> options with one choose_option call per select against
+LLMHandler.choose_select_options, which batches them into one structured call (or a few
+concurrent ones for long option lists). The wanted answers are phrased so the local option
+matcher cannot resolve them and every select reaches the (fake) LLM.
+
+Usage (from the backend directory):
+    python benchmarks/bench_select_batch.py [--selects 8] [--latency 0.8]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm import LLMHandler
+from benchmarks.fake_chat_model import FakeChatModel
+from benchmarks.pages import COUNTRIES
+
+DIRECTIONS = "In the list of options, select the value which seems most likely."
+
+
+def select_tags(num_selects, num_options):
+    options = [{'value': f"{COUNTRIES[i % len(COUNTRIES)]}", 'text': COUNTRIES[i % len(COUNTRIES)]} for i in range(num_options)]
+    return [
+        {'key': f"select_{i}", 'tag_type': 'select', 'select_option_value': 'the country I live in', 'select_options': options}
+        for i in range(num_selects)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--selects", type=int, default=8)
+    parser.add_argument("--options", type=int, default=12, help="options per select")
+    parser.add_argument("--latency", type=float, default=0.8, help="seconds per fake LLM call")
+    args = parser.parse_args()
+
+    tags = select_tags(args.selects, args.options)
+    fake = FakeChatModel(latency=args.latency, content='Canada', structured_text='Canada')
+    handler = LLMHandler(llm=fake)
+
+    start = time.perf_counter()
+    serial = {tag['key']: handler.choose_option(tag['select_option_value'], tag['select_options'], DIRECTIONS) for tag in tags}
+    serial_time, serial_calls = time.perf_counter() - start, fake.calls
+
+    fake.calls = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        batched = handler.choose_select_options(tags, DIRECTIONS)
+        batched_time = time.perf_counter() - start
+    assert batched == serial, "batched and per-field answers differ"
+
+    print(f"{args.selects} selects x {args.options} options, fake LLM latency {args.latency}s")
+    print(f"per field: {serial_calls:3d} calls {serial_time:6.2f} s")
+    print(f"batched:   {fake.calls:3d} calls {batched_time:6.2f} s  speedup {serial_time / batched_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
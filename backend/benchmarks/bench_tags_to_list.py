@@ -0,0 +1,79 @@
+"""
+Compares HTMLHandler.tags_to_list with the previous per-tag find_all_previous/find_all_next
+implementation and checks that both produce identical output.
+
+Usage (from the backend directory):
+    python benchmarks/bench_tags_to_list.py [--pages DIR_WITH_SAVED_HTML]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_handler import HTMLHandler
+from benchmarks.pages import load_pages
+
+
+def legacy_tags_to_list(soup):
+    result_list = []
+    counts = {}
+    for idx, tag in enumerate(soup.find_all(['input', 'select', 'textarea', 'button'])):
+        tag_dict = {attr: tag.get(attr) for attr in HTMLHandler.allowed_attrs if tag.has_attr(attr)}
+        counts[tag.name] = counts.get(tag.name, 0) + 1
+        if tag.name == 'select':
+            tag_dict["select_options"] = [
+                {'value': option.get('value', ''), 'text': option.text.strip()} for option in tag.find_all('option')
+            ]
+        text_above = []
+        for prev in tag.find_all_previous(string=True, limit=3):
+            stripped = prev.strip()
+            if stripped:
+                text_above.append(stripped[:min(120, len(stripped))])
+        text_above.reverse()
+        text_below = []
+        for next_ in tag.find_all_next(string=True, limit=3):
+            stripped = next_.strip()
+            if stripped:
+                text_below.append(stripped[:min(120, len(stripped))])
+        tag_dict["text_above_htmltag"] = text_above
+        tag_dict["text_below_htmltag"] = text_below
+        tag_dict["key"] = f"{tag.name}_{counts[tag.name]}"
+        tag_dict["idx"] = idx
+        tag_dict["tag_type"] = tag.name
+        result_list.append(tag_dict)
+    return result_list
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", help="directory of saved rendered pages (*.html)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for name, html in load_pages(args.pages):
+        handler = HTMLHandler(html)
+        legacy_time, legacy = timed(lambda: legacy_tags_to_list(handler.soup), args.repeat)
+        new_time, new = timed(handler.tags_to_list, args.repeat)
+        identical = legacy == new
+        print(
+            f"{name:32s} {len(html) / 1e6:6.2f} MB {len(new):4d} tags  "
+            f"legacy {legacy_time * 1000:9.1f} ms  single pass {new_time * 1000:8.1f} ms  "
+            f"speedup {legacy_time / new_time:6.1f}x  identical={identical}"
+        )
+        assert identical, f"output differs on {name}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Compares HTMLHandler.get_element_with_text (text index built once per parse) with the
+previous soup.find(string=...) scan on large pages.
+
+Usage (from the backend directory):
+    python benchmarks/bench_text_lookup.py [--pages DIR_WITH_SAVED_HTML] [--lookups 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_handler import HTMLHandler
+from benchmarks.pages import load_pages
+
+
+def legacy_find(handler, search_text):
+    return handler.soup.find(string=lambda text: search_text.strip() == text.strip() if text else False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", help="directory of saved rendered pages (*.html)")
+    parser.add_argument("--lookups", type=int, default=20, help="lookups per page, like one per dropdown")
+    args = parser.parse_args()
+
+    for name, html in load_pages(args.pages):
+        handler = HTMLHandler(html)
+        texts = [text for text in handler.get_lines_of_text() if len(text) > 3]
+        # Spread the lookups over the page, ending near the bottom where forms usually sit
+        step = max(1, len(texts) // args.lookups)
+        queries = texts[step - 1::step][:args.lookups]
+
+        start = time.perf_counter()
+        legacy = [legacy_find(handler, text) for text in queries]
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indexed = [handler.find_text_node(text) for text in queries]
+        indexed_time = time.perf_counter() - start
+
+        assert legacy == indexed, f"lookup results differ on {name}"
+        print(
+            f"{name:28s} {len(queries):3d} lookups  scan {legacy_time * 1000:9.1f} ms  "
+            f"index (incl. build) {indexed_time * 1000:8.1f} ms  speedup {legacy_time / indexed_time:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Measures plain versus compressed transport of the page html for new_work (socket binary attachment)
+and /api/select_option (Content-Encoding): bytes on the wire, client-side compression time, server
+time from receiving the payload to its response, and the modeled end-to-end latency over links of
+--mbps megabits per second (compression + transfer + server time).
+
+The new_work server time runs the whole workflow with a zero-latency fake chat model through a
+Flask-SocketIO test client; select_option uses the Flask test client with an answer the local option
+matcher resolves, so neither needs the OpenAI API. Both also check that every encoding gives the same result.
+
+Usage (from the backend directory):
+    python benchmarks/bench_transport.py [--pages DIR_WITH_SAVED_HTML] [--mbps 10 100] [--repeat 3]
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import llm
+from benchmarks.fake_chat_model import FakeChatModel
+from benchmarks.pages import load_pages
+
+ENCODERS = {
+    'identity': lambda data: data,
+    # Level 6 is the default of the browser's CompressionStream as well
+    'gzip': lambda data: gzip.compress(data, compresslevel=6, mtime=0),
+    'deflate': lambda data: zlib.compress(data, 6),
+}
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def run_new_work(app, work_id, html, encoding):
+    """:return: Tuple of (seconds from emit to end-process, wire bytes, compress seconds, end-process data)."""
+    compress_time, body = timed(lambda: ENCODERS[encoding](html.encode('utf-8')))
+    if encoding == 'identity':
+        payload = {'work_id': work_id, 'renderedHTML': html}
+    else:
+        payload = {'work_id': work_id, 'renderedHTMLCompressed': body, 'encoding': encoding}
+    client = app.socketio.test_client(app.app)
+    client.get_received()
+    start = time.perf_counter()
+    client.emit('new_work', payload, callback=True)
+    while True:
+        ends = [event for event in client.get_received() if event['name'] == 'end-process']
+        if ends:
+            break
+        time.sleep(0.002)
+    elapsed = time.perf_counter() - start
+    client.disconnect()
+    return elapsed, len(body), compress_time, ends[0]['args'][0]
+
+
+def run_select_option(app, work_id, html, encoding):
+    """:return: Tuple of (server seconds, wire bytes, compress seconds, response json)."""
+    body = json.dumps({
+        'work_id': work_id, 'options': ['Yes', 'No'], 'description': 'Are you authorized to work?',
+        'answer': 'Yes', 'newHtml': html + '<div role="option">Yes</div><div role="option">No</div>',
+    }).encode('utf-8')
+    compress_time, body = timed(lambda: ENCODERS[encoding](body))
+    headers = {'Content-Type': 'application/json'}
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    client = app.app.test_client()
+    elapsed, response = timed(lambda: client.post('/api/select_option', data=body, headers=headers))
+    return elapsed, len(body), compress_time, response.get_json()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", help="directory of saved rendered pages (*.html); defaults to synthetic pages")
+    parser.add_argument("--mbps", type=float, nargs="+", default=[10.0, 100.0], help="link speeds to model")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the fastest is reported")
+    args = parser.parse_args()
+
+    config.PLAN_CACHE_ENABLED = False
+    config.ANSWER_CACHE_ENABLED = False
+    config.TRACE_ENABLED = False
+    llm._shared_llms[config.LLM_MODEL_NAME] = FakeChatModel(latency=0.0)
+    import app
+    from global_state import globalStateMgr
+    from workflow_runner import WorkflowRunner
+
+    links = ' '.join(f"{'e2e@' + format(mbps, 'g') + 'M':>10s}" for mbps in args.mbps)
+    print(f"{'page':28s} {'channel':14s} {'encoding':9s} {'wire KB':>9s} {'ratio':>6s} {'compress':>9s} {'server':>8s} {links}")
+    failures = 0
+    for name, html in load_pages(args.pages):
+        for channel, run in (('new_work', run_new_work), ('select_option', run_select_option)):
+            results = {}
+            for encoding in ENCODERS:
+                best = None
+                for attempt in range(args.repeat):
+                    work_id = f"{channel}-{encoding}-{attempt}"
+                    if channel == 'select_option':
+                        wr = WorkflowRunner(work_id, None)
+                        wr.context = 'I am authorized to work.'
+                        globalStateMgr.add_workflow_runner(work_id, wr)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        server, wire, compress, result = run(app, work_id, html, encoding)
+                    globalStateMgr.remove_workflow_runner(work_id)
+                    if best is None or server + compress < best[0] + best[2]:
+                        best = (server, wire, compress, result)
+                results[encoding] = best
+            plain_wire = results['identity'][1]
+            for encoding, (server, wire, compress, result) in results.items():
+                e2e = ' '.join(f"{(compress + wire * 8 / (mbps * 1e6) + server) * 1000:8.1f}ms" for mbps in args.mbps)
+                print(
+                    f"{name:28s} {channel:14s} {encoding:9s} {wire / 1024:9.1f} {plain_wire / wire:5.1f}x "
+                    f"{compress * 1000:7.1f}ms {server * 1000:6.1f}ms {e2e}"
+                )
+            outcomes = {json.dumps({k: v for k, v in result.items() if k != 'work_id'}, sort_keys=True) for *_, result in results.values()}
+            if len(outcomes) != 1 or 'error' in results['identity'][3]:
+                failures += 1
+                print(f"{'':28s} MISMATCH between encodings: {sorted(outcomes)}")
+    if failures:
+        sys.exit(f"{failures} page/channel pair(s) gave different results per encoding")
+
+
+if __name__ == "__main__":
+    main()
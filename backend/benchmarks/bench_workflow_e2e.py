@@ -0,0 +1,147 @@
+"""
+Drives the saved forms in benchmarks/corpus through WorkflowRunner.run with a fake socket sink
+and reports parse, summarize, relevance and emit timings, tokens and fills per form.
+
+LLM modes:
+    fake    FakeChatModel with --latency per call (default, needs nothing)
+    record  record structured outputs to --recordings (from OpenAI, or from the fake with --record-from fake)
+    replay  serve the outputs from --recordings with --latency per call
+
+Summarize and relevance times are the summed latencies of their chunk calls, which overlap when run concurrently.
+
+With --save FILE the per-form results are written as JSON; with --compare FILE they are checked against
+such a baseline and the script exits non-zero when fills or tokens changed, or a timing regressed by
+more than --tolerance. Fake and replay runs are deterministic, so this works in CI on a plain Linux box.
+
+Usage (from the backend directory):
+    python benchmarks/bench_workflow_e2e.py [--mode fake|record|replay] [--pages DIR] [--compare baseline.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import config
+import llm
+import workflow_runner
+from llm_recorder import RecordReplayChatModel
+from benchmarks.fake_chat_model import FakeChatModel
+from benchmarks.fake_socket import FakeSocketSink
+from benchmarks.pages import load_pages
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+# Timings below this many seconds are too noisy to compare against a baseline
+MIN_COMPARED_SECONDS = 0.05
+
+
+def install_model(args):
+    if args.mode == 'fake':
+        model = FakeChatModel(latency=args.latency, structured_text=None)
+    elif args.mode == 'replay':
+        model = RecordReplayChatModel(args.recordings, 'replay', latency=args.latency)
+    else:
+        inner = FakeChatModel(latency=args.latency) if args.record_from == 'fake' else llm.ChatOpenAI(model_name=config.LLM_MODEL_NAME)
+        model = RecordReplayChatModel(args.recordings, 'record', inner=inner)
+    llm._shared_llms[config.LLM_MODEL_NAME] = model
+    return model
+
+
+def run_form(name, html, context_doc):
+    sink = FakeSocketSink()
+    workflow_runner.socketio = sink
+    runner = workflow_runner.WorkflowRunner(name, html)
+    runner.context = context_doc
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        runner.run()
+    total = time.perf_counter() - start
+    reports = runner.results.get('chunk_reports', [])
+    timings = runner.results.get('timings', {})
+
+    def stage(schema_name, field):
+        return sum(report[field] or 0 for report in reports if report['stage'] == schema_name)
+
+    fills = sum(len(frame['data']['actions']) if frame['event'] == 'fill_batch' else 1 for frame in sink.frames)
+    return {
+        'tags': len(runner.plan or []),
+        'parse': timings.get('parse', 0.0) + timings.get('tags_to_list', 0.0),
+        'summarize': stage('InputTagSummaryList', 'seconds'),
+        'relevance': stage('InputTagDescriptionList', 'seconds'),
+        'emit': timings.get('emit', 0.0),
+        'total': total,
+        'input_tokens': sum(report['actual_input_tokens'] or 0 for report in reports),
+        'output_tokens': sum(report['actual_output_tokens'] or 0 for report in reports),
+        'fills': fills,
+    }
+
+
+def compare(results, baseline, tolerance):
+    problems = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for field in ('tags', 'fills', 'input_tokens', 'output_tokens'):
+            if result[field] != expected[field]:
+                problems.append(f"{name}: {field} {expected[field]} -> {result[field]}")
+        for field in ('parse', 'summarize', 'relevance', 'emit', 'total'):
+            if result[field] > MIN_COMPARED_SECONDS and result[field] > expected[field] * (1 + tolerance):
+                problems.append(f"{name}: {field} {expected[field]:.3f}s -> {result[field]:.3f}s")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=("fake", "record", "replay"), default="fake")
+    parser.add_argument("--record-from", choices=("openai", "fake"), default="openai")
+    parser.add_argument("--recordings", default=os.path.join(CORPUS_DIR, "recordings.jsonl"))
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake or replayed LLM call")
+    parser.add_argument("--pages", default=CORPUS_DIR, help="directory of saved rendered forms (*.html)")
+    parser.add_argument("--save", help="write the per-form results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON written by --save")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative timing regression")
+    args = parser.parse_args()
+    for option in ('recordings', 'pages', 'save', 'compare'):
+        if getattr(args, option):
+            setattr(args, option, os.path.abspath(getattr(args, option)))
+
+    # Every run must reach the LLM, and nothing should be written into the working tree
+    config.PLAN_CACHE_ENABLED = False
+    config.ANSWER_CACHE_ENABLED = False
+    model = install_model(args)
+    with open(os.path.join(BACKEND_DIR, "context.txt"), "r", encoding="utf-8") as file:
+        context_doc = file.read()
+    os.chdir(tempfile.mkdtemp(prefix="aplora-bench-"))
+
+    results = {}
+    print(f"{'form':28s} {'tags':>4s} {'parse':>7s} {'summ':>7s} {'relev':>7s} {'emit':>7s} {'total':>7s} {'tok in':>7s} {'tok out':>7s} {'fills':>5s}")
+    for name, html in load_pages(args.pages):
+        result = results[name] = run_form(name, html, context_doc)
+        print(
+            f"{name:28s} {result['tags']:4d} {result['parse']:7.3f} {result['summarize']:7.3f} {result['relevance']:7.3f} "
+            f"{result['emit']:7.3f} {result['total']:7.3f} {result['input_tokens']:7d} {result['output_tokens']:7d} {result['fills']:5d}"
+        )
+    if args.mode == 'replay':
+        print(f"replay: {model.hits} hits, {model.misses} misses")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            problems = compare(results, json.load(file), args.tolerance)
+        for problem in problems:
+            print("REGRESSION", problem)
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
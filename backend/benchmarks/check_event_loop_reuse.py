@@ -0,0 +1,95 @@
+"""
+Runs WorkflowRunner.run_step_1 twice in a row against a local fake OpenAI server through a real
+ChatOpenAI client, and checks that the second run reuses the shared client without connection
+errors, retries or failed chunks. The shared client keeps pooled keep-alive connections, which
+only stay usable when every run drives them from the same event loop.
+
+Usage (from the backend directory):
+    python benchmarks/check_event_loop_reuse.py [--runs 2]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import llm
+import llm_gateway
+from langchain_openai import ChatOpenAI
+from benchmarks.pages import synthetic_form_page
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Answers every chat completion with an empty structured result, over keep-alive connections."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        message = {'role': 'assistant', 'content': ''}
+        if request.get('tools'):
+            message['tool_calls'] = [{
+                'id': 'call_0', 'type': 'function',
+                'function': {'name': request['tools'][0]['function']['name'], 'arguments': '{"tags": []}'},
+            }]
+        else:
+            message['content'] = 'Yes'
+        body = json.dumps({
+            'id': 'chatcmpl-0', 'object': 'chat.completion', 'created': 0, 'model': request['model'],
+            'choices': [{'index': 0, 'message': message, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15},
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=2)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    config.PLAN_CACHE_ENABLED = False
+    config.ANSWER_CACHE_ENABLED = False
+    config.RULE_CLASSIFIER_MIN_CONFIDENCE = 2.0
+    llm._shared_llms[config.LLM_MODEL_NAME] = ChatOpenAI(
+        model_name=config.LLM_MODEL_NAME, api_key='fake', base_url=f'http://127.0.0.1:{server.server_port}/v1',
+        max_retries=0, timeout=10,
+    )
+    from html_handler import HTMLHandler
+    from workflow_runner import WorkflowRunner
+
+    html = synthetic_form_page(20, 0)
+    failures = 0
+    for run in range(1, args.runs + 1):
+        runner = WorkflowRunner(f'run-{run}', html)
+        runner.context = 'My name is Jane Doe.'
+        runner.html_handler = HTMLHandler(html)
+        with contextlib.redirect_stdout(io.StringIO()):
+            runner.run_step_1()
+        gateway = llm_gateway.get_gateway(config.LLM_MODEL_NAME, llm._shared_llms[config.LLM_MODEL_NAME])
+        stats = gateway.stats()
+        failed = runner.results.get('failed_chunks', 0)
+        ok = failed == 0 and stats['retries'] == 0 and stats['failures'] == 0
+        failures += not ok
+        print(f"run {run}: {len(runner.results.get('chunk_reports', []))} chunk calls, {failed} failed chunks, "
+              f"gateway retries so far {stats['retries']}, failures {stats['failures']} -> {'ok' if ok else 'FAILED'}")
+    server.shutdown()
+    if failures:
+        sys.exit(f"{failures} run(s) failed to reuse the shared client")
+
+
+if __name__ == "__main__":
+    main()
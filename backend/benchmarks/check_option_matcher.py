@@ -0,0 +1,69 @@
+"""
+Runs the deterministic option matcher over typical dropdown decisions and reports how many
+it resolves without the LLM at the configured threshold, and whether it picked the right option.
+
+Usage (from the backend directory):
+    python benchmarks/check_option_matcher.py [--min-score 0.85]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from option_matcher import match_option
+
+YES_NO = [{'value': '', 'text': 'Select...'}, {'value': '1', 'text': 'Yes'}, {'value': '0', 'text': 'No'}]
+COUNTRIES = [{'value': 'US', 'text': 'United States'}, {'value': 'CA', 'text': 'Canada'}, {'value': 'IN', 'text': 'India'}, {'value': 'GB', 'text': 'United Kingdom'}]
+STATES = ['Select a state', 'California', 'New York', 'Texas', 'Washington']
+STATE_CODES = [{'value': '', 'text': 'State'}, {'value': 'CA', 'text': 'CA'}, {'value': 'IN', 'text': 'IN'}, {'value': 'NY', 'text': 'NY'}]
+VETERAN = ['I am not a protected veteran', 'I identify as one or more of the classifications of protected veteran', "I don't wish to answer"]
+DISABILITY = [
+    'Yes, I have a disability (or previously had a disability)',
+    'No, I do not have a disability and have not had one in the past',
+    'I do not want to answer',
+]
+GENDER = ['Man', 'Woman', 'Non-binary', 'I prefer not to say']
+MONTHS = ['Dec 2024', 'Jan 2026']
+LEVELS = ['Level 1', 'Level 3', 'Level 4']
+EXPERIENCE = ['Less than 1 year', '1 year', '3 years', '5+ years']
+
+# (answer, options, index of the correct option, or None when the LLM should decide)
+CASES = [
+    ('Yes', YES_NO, 1), ('no', YES_NO, 2), ('True', YES_NO, 1),
+    ('USA', COUNTRIES, 0), ('United States of America', COUNTRIES, 0), ('India', COUNTRIES, 2), ('UK', COUNTRIES, 3),
+    ('TX', STATES, 3), ('new york', STATES, 2), ('Washington State', STATES, 4),
+    ('California', STATE_CODES, 1), ('Indiana', STATE_CODES, 2),
+    # State codes must not be read as states in a country list: CA is Canada, IN is India
+    ('California', COUNTRIES, None), ('Indiana', COUNTRIES, None), ('CA', COUNTRIES, 1),
+    ('No', VETERAN, 0), ('Yes', VETERAN, 1), ('I am not a veteran', VETERAN, 0),
+    ('No', DISABILITY, 1), ('Yes', DISABILITY, 0),
+    ('Male', GENDER, 0), ('female', GENDER, 1),
+    # Near misses that differ only in a number are for the LLM, never a local fuzzy pick
+    ('Dec 2025', MONTHS, None), ('Level 2', LEVELS, None), ('2 years', EXPERIENCE, None),
+    ('3 years experience', EXPERIENCE, 2),
+    ('Software engineer at a startup', COUNTRIES, None), ('Referred by a friend', YES_NO, None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--min-score", type=float, default=config.OPTION_MATCH_MIN_SCORE)
+    args = parser.parse_args()
+
+    resolved = wrong = 0
+    for answer, options, expected in CASES:
+        index, score, method = match_option(answer, options)
+        local = index is not None and score >= args.min_score
+        resolved += local
+        wrong += local and index != expected
+        verdict = ('ok' if index == expected else 'WRONG') if local else '-'
+        print(f"{answer!r:34s} {method:10s} score {score:4.2f}  {'local' if local else 'LLM  '}  {verdict}")
+    print(f"{resolved}/{len(CASES)} resolved locally at min score {args.min_score}, {wrong} wrong")
+    if wrong:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
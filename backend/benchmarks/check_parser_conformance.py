@@ -0,0 +1,72 @@
+"""
+Checks that every HTMLHandler parser backend gives the same tags_to_list and
+get_element_with_text results as the default html.parser backend, and reports parse times.
+
+Usage (from the backend directory):
+    python benchmarks/check_parser_conformance.py [--pages DIR_WITH_SAVED_HTML]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_handler import HTMLHandler
+from benchmarks.pages import load_pages
+
+# Derived from source line numbers, which only html.parser records.
+SOURCE_POSITION_FIELDS = ('key', 'idx')
+
+
+def lookup_texts(tags):
+    texts = set()
+    for tag in tags:
+        texts.update(tag.get('text_above_htmltag', []))
+        texts.update(option['text'] for option in tag.get('select_options', []) if option['text'])
+    return sorted(texts)
+
+
+def element_lookups(handler, texts):
+    results = []
+    for text in texts:
+        element = handler.get_element_with_text(text)
+        if element is not None:
+            element = {k: v for k, v in element.items() if k not in SOURCE_POSITION_FIELDS}
+        results.append(element)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", help="directory of saved rendered pages (*.html)")
+    args = parser.parse_args()
+
+    variants = [(backend, False) for backend in HTMLHandler.parser_backends]
+    variants += [(backend, True) for backend in HTMLHandler.parser_backends]
+    failures = 0
+    for name, html in load_pages(args.pages):
+        reference = HTMLHandler(html, parser='html.parser', body_only=False)
+        reference_tags = reference.tags_to_list()
+        texts = lookup_texts(reference_tags)
+        reference_lookups = element_lookups(reference, texts)
+        for backend, body_only in variants:
+            start = time.perf_counter()
+            handler = HTMLHandler(html, parser=backend, body_only=body_only)
+            parse_time = time.perf_counter() - start
+            same_tags = handler.tags_to_list() == reference_tags
+            same_lookups = element_lookups(handler, texts) == reference_lookups
+            # Dropping <head> legitimately changes the text around the first controls
+            required = not body_only
+            failures += required and not (same_tags and same_lookups)
+            print(
+                f"{name:28s} {handler.parser:12s} body_only={body_only!s:5s} parse {parse_time * 1000:8.1f} ms  "
+                f"tags_to_list={'same' if same_tags else 'DIFFERENT'}  "
+                f"get_element_with_text={'same' if same_lookups else 'DIFFERENT'} ({len(texts)} lookups)"
+            )
+    if failures:
+        sys.exit(f"{failures} backend(s) not equivalent to html.parser")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compiles typical context documents into profiles and checks the fields the profile fast path would
+fill without the LLM: the applicant's own details must win, and details of references, emergency
+contacts, tech names and date ranges must never end up in the profile.
+
+Usage (from the backend directory):
+    python benchmarks/check_profile_compiler.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profile_compiler import compile_profile
+
+HEADER_AND_REFERENCES = """Jane Doe
+jane.doe@gmail.com | (415) 555-0132 | linkedin.com/in/janedoe
+
+Experience
+Acme Corp, Software Engineer (2019.05 - 2023.08)
+Skills: Node.js/Express, ASP.NET/C#
+
+References
+Name: John Roe
+Email: john.roe@acme.com
+Phone: 555-987-6543
+"""
+LABELED = """Curriculum Vitae
+Name: Jane Doe
+Email: jane@example.org
+Phone: +1 415 555 0132
+Website: janedoe.dev
+Emergency contact phone: 555-987-6543
+"""
+HEADER_AND_LATER_LABELS = """Jane Doe
+jane.doe@gmail.com
+415.555.0132
+Name: J. Doe
+Email: jane.work@acme.com
+Phone: 555-111-2222
+"""
+INLINE_REFERENCE = """Jane Doe
+Reference: John Roe, john.roe@acme.com, 555-987-6543
+Contact me at jane.doe@gmail.com or 415-555-0132.
+"""
+
+# (name, document, expected values; None means the field must be absent)
+CASES = [
+    ('header + references', HEADER_AND_REFERENCES, {
+        'name': 'Jane Doe', 'email': 'jane.doe@gmail.com', 'tel': '(415) 555-0132',
+        'linkedin': 'linkedin.com/in/janedoe', 'url': None,
+    }),
+    ('labelled fields', LABELED, {
+        'name': 'Jane Doe', 'email': 'jane@example.org', 'tel': '+1 415 555 0132', 'url': 'janedoe.dev',
+    }),
+    ('header before labels', HEADER_AND_LATER_LABELS, {
+        'name': 'Jane Doe', 'email': 'jane.doe@gmail.com', 'tel': '415.555.0132',
+    }),
+    ('inline reference', INLINE_REFERENCE, {
+        'name': 'Jane Doe', 'email': 'jane.doe@gmail.com', 'tel': '415-555-0132',
+    }),
+]
+
+
+def main():
+    wrong = 0
+    for name, document, expected in CASES:
+        profile = compile_profile(document)
+        for field, value in expected.items():
+            ok = profile.get(field) == value
+            wrong += not ok
+            print(f"{name:22s} {field:9s} {profile.get(field)!r:32s} {'ok' if ok else f'WRONG, expected {value!r}'}")
+    print(f"{sum(len(expected) for *_, expected in CASES)} fields checked, {wrong} wrong")
+    if wrong:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Looks up option texts that are not on the page verbatim with HTMLHandler.find_text_node and checks
+that the fuzzy fallback only picks an option that names the same thing, and otherwise finds nothing
+so the caller asks again instead of clicking a wrong option.
+
+Usage (from the backend directory):
+    python benchmarks/check_text_match.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_handler import HTMLHandler
+
+
+def listbox(*options):
+    items = ''.join(f'<li role="option">{option}</li>' for option in options)
+    return f'<html><body><p>Question</p><ul role="listbox">{items}</ul></body></html>'
+
+
+GENDER = listbox('Female', 'Non-binary', 'Man')
+EXPERIENCE = listbox('Less than 1 year', '1 year', '3 years', '5+ years')
+MONTHS = listbox('Dec 2024', 'Jan 2026')
+PRIVACY = listbox('Yes.', 'No.', 'I prefer not to say')
+COUNTRIES = listbox('United States of America', 'United Kingdom')
+
+# (search text, page, expected matched text, or None when nothing may match)
+CASES = [
+    ('Male', GENDER, None), ('2 years', EXPERIENCE, None), ('Dec 2025', MONTHS, None),
+    ('Prefer not to say', PRIVACY, 'I prefer not to say'), ('Yes', PRIVACY, 'Yes.'),
+    ('United States', COUNTRIES, None),
+]
+
+
+def main():
+    wrong = 0
+    for search_text, html, expected in CASES:
+        node = HTMLHandler(html).find_text_node(search_text)
+        found = node.strip() if node is not None else None
+        ok = found == expected
+        wrong += not ok
+        print(f"{search_text!r:22s} -> {found!r:24s} {'ok' if ok else f'WRONG, expected {expected!r}'}")
+    print(f"{len(CASES)} lookups, {wrong} wrong")
+    if wrong:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import asyncio
+import re
+import time
+import typing
+
+from langchain_core.messages import AIMessage
+
+KEY_PATTERN = re.compile(r"\bkey'?(?:: |=)'([^']+)'")
+
+
+class FakeRateLimitError(Exception):
+    """Mimics openai.RateLimitError, which carries the HTTP status code."""
+    status_code = 429
+
+
+class FakeChatModel:
+    """
+    Offline stand-in for ChatOpenAI used by the benchmarks.
+    Every call sleeps for `latency` seconds and answers with one record per tag key found in the prompt.
+    Required free-text fields of structured records are set to `structured_text`.
+    With `rate_limit_every` set, every n-th call fails with a FakeRateLimitError after its latency.
+    """
+    def __init__(self, latency: float = 0.2, content: str = "", structured_text: str = None, rate_limit_every: int = 0):
+        self.latency = latency
+        self.content = content
+        self.structured_text = structured_text
+        self.rate_limit_every = rate_limit_every
+        self.calls = 0
+        self.rate_limited = 0
+
+    def check_rate_limit(self, call_number):
+        if self.rate_limit_every and call_number % self.rate_limit_every == 0:
+            self.rate_limited += 1
+            raise FakeRateLimitError("Rate limit reached for requests")
+
+    def with_structured_output(self, schema, include_raw=False):
+        return FakeStructuredModel(self, schema, include_raw)
+
+    def invoke(self, prompt):
+        self.calls += 1
+        call_number = self.calls
+        time.sleep(self.latency)
+        self.check_rate_limit(call_number)
+        return AIMessage(content=self.content)
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        call_number = self.calls
+        await asyncio.sleep(self.latency)
+        self.check_rate_limit(call_number)
+        return AIMessage(content=self.content)
+
+
+class FakeStructuredModel:
+    def __init__(self, chat_model, schema, include_raw=False):
+        self.chat_model = chat_model
+        self.schema = schema
+        self.include_raw = include_raw
+
+    def invoke(self, prompt):
+        self.chat_model.calls += 1
+        call_number = self.chat_model.calls
+        time.sleep(self.chat_model.latency)
+        self.chat_model.check_rate_limit(call_number)
+        return self._build(prompt)
+
+    async def ainvoke(self, prompt):
+        self.chat_model.calls += 1
+        call_number = self.chat_model.calls
+        await asyncio.sleep(self.chat_model.latency)
+        self.chat_model.check_rate_limit(call_number)
+        return self._build(prompt)
+
+    def _build(self, prompt):
+        item_model = typing.get_args(self.schema.model_fields["tags"].annotation)[0]
+        prompt_text = prompt.to_string()
+        keys = KEY_PATTERN.findall(prompt_text)
+        parsed = self.schema(tags=[item_model(**fake_fields(item_model, key, self.chat_model.structured_text)) for key in keys])
+        if not self.include_raw:
+            return parsed
+        raw = AIMessage(content="", usage_metadata={
+            "input_tokens": len(prompt_text) // 4,
+            "output_tokens": 30 * len(keys),
+            "total_tokens": len(prompt_text) // 4 + 30 * len(keys),
+        })
+        return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+
+def fake_fields(item_model, key, text=None):
+    fields = {}
+    for name, field in item_model.model_fields.items():
+        if name == "key":
+            fields[name] = key
+        elif not field.is_required():
+            continue
+        elif typing.get_origin(field.annotation) is typing.Literal:
+            fields[name] = typing.get_args(field.annotation)[0]
+        else:
+            fields[name] = text
+    return fields
@@ -0,0 +1,24 @@
+import json
+import threading
+import time
+
+
+class FakeSocketSink:
+    """
+    Stand-in for the Flask-SocketIO server used by the benchmarks.
+    Records every emitted frame with its size and emit time instead of sending it.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frames = []
+
+    def emit(self, event, data=None, **kwargs):
+        payload = json.dumps(data, default=str)
+        with self.lock:
+            self.frames.append({'event': event, 'bytes': len(payload.encode('utf-8')), 'at': time.perf_counter(), 'data': data})
+
+    def events(self, name=None):
+        return [frame for frame in self.frames if name is None or frame['event'] == name]
+
+    def total_bytes(self):
+        return sum(frame['bytes'] for frame in self.frames)
@@ -0,0 +1,69 @@
+import glob
+import os
+import random
+
+COUNTRIES = ["United States", "Canada", "Mexico", "India", "Germany", "France", "Japan", "Brazil", "Kenya", "Australia"]
+
+
+def synthetic_form_page(num_fields: int = 60, filler_blocks: int = 2000, seed: int = 0, inline_images: int = 0) -> str:
+    """
+    Build a large rendered page resembling an applicant-tracking system form:
+    deeply nested wrappers, whitespace-only text nodes, inline scripts/styles/SVG icons,
+    and a mix of text inputs, react-select style dropdowns, radio groups, selects and checkboxes.
+    :param inline_images: Number of filler blocks that also carry a base64 encoded image of about 20 KB.
+    """
+    rng = random.Random(seed)
+    parts = [
+        "<!DOCTYPE html><html><head><title>Apply</title>",
+        "<style>" + ".c{color:red}" * 2000 + "</style>",
+        "<script>" + "var analytics = {};" * 2000 + "</script></head><body>",
+    ]
+    for i in range(filler_blocks):
+        parts.append(
+            f'<div class="wrapper w{i}">\n  <div class="inner">\n    <span>Filler text {i}</span>\n'
+            f'    <svg viewBox="0 0 10 10"><path d="M0 0L10 10"/></svg>\n  </div>\n</div>\n'
+        )
+        if i < inline_images:
+            parts.append(f'<img alt="" src="data:image/png;base64,{"iVBORw0KGgo" * 1800}">\n')
+    parts.append('<form id="application-form">')
+    for i in range(num_fields):
+        kind = i % 6
+        parts.append(f'<div class="field">\n  <label for="q{i}">Question {i} <span>*</span></label>\n')
+        if kind == 0:
+            parts.append(f'  <input id="q{i}" name="question_{i}" type="text" aria-required="true">\n')
+        elif kind == 1:
+            parts.append(
+                f'  <div class="select__control"><input id="q{i}" class="select__input" type="text" '
+                f'aria-haspopup="true" autocomplete="off"><div>Select...</div></div>\n'
+            )
+        elif kind == 2:
+            for option in ("Yes", "No"):
+                parts.append(f'  <input type="radio" name="radio_{i}" value="{option}"><span>{option}</span>\n')
+        elif kind == 3:
+            options = "".join(f'<option value="{c}">{c}</option>' for c in rng.sample(COUNTRIES, len(COUNTRIES)))
+            parts.append(f'  <select id="q{i}" name="select_{i}">{options}</select>\n')
+        elif kind == 4:
+            parts.append(f'  <input type="checkbox" id="q{i}" name="check_{i}"><span>I agree</span>\n')
+        else:
+            parts.append(f'  <textarea id="q{i}" name="text_{i}"></textarea>\n')
+        parts.append('</div>\n')
+    parts.append('<button type="submit">Submit application</button></form>')
+    parts.append("<script>" + "window.dataLayer.push({});" * 1000 + "</script></body></html>")
+    return "".join(parts)
+
+
+def load_pages(pages_dir: str = None):
+    """
+    Return a list of (name, html) pairs: the saved pages under `pages_dir` when given,
+    otherwise synthetic pages of increasing size.
+    """
+    if pages_dir:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(pages_dir, "*.html"))):
+            with open(path, "r", encoding="utf-8") as file:
+                pages.append((os.path.basename(path), file.read()))
+        return pages
+    return [
+        (f"synthetic-{fields}f-{blocks}b", synthetic_form_page(fields, blocks))
+        for fields, blocks in ((30, 200), (60, 2000), (120, 10000))
+    ]
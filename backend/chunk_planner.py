@@ -0,0 +1,89 @@
+import math
+
+import config
+
+# Rough average for English text and JSON-ish tag dumps with OpenAI tokenizers.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_text_tokens(text: str) -> int:
+    """
+    Estimate the number of prompt tokens for `text` without calling a tokenizer.
+    """
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def estimate_tag_tokens(tag) -> int:
+    """
+    Estimate the prompt tokens a single tag adds to a chunk.
+    Tags are rendered into the prompt with their repr, so that is what gets measured;
+    a `select` tag with a long `select_options` list costs accordingly.
+    """
+    return estimate_text_tokens(str(tag))
+
+
+def radio_group_name(tag):
+    """
+    :return: The `name` shared by the radio buttons of `tag`'s group, or None when `tag` is no named radio button.
+    """
+    if isinstance(tag, dict) and tag.get('type') == 'radio' and tag.get('name'):
+        return tag['name']
+    return None
+
+
+def group_radio_units(tags):
+    """
+    Group the tags into units that must stay in the same chunk.
+    All radio buttons sharing a `name` form one unit, placed at the position of the first one;
+    every other tag is a unit of its own.
+    :return: List of units, each a list of tags, in page order.
+    """
+    units = []
+    radio_units = {}
+    for tag in tags:
+        name = radio_group_name(tag)
+        if name is not None:
+            if name in radio_units:
+                radio_units[name].append(tag)
+                continue
+            radio_units[name] = [tag]
+            units.append(radio_units[name])
+        else:
+            units.append([tag])
+    return units
+
+
+def plan_chunks(tags, token_budget: int = None, max_tags: int = None):
+    """
+    Pack tags into contiguous chunks of roughly equal estimated token cost.
+
+    The chunk count follows from the form size: enough chunks to keep each one under
+    `token_budget` estimated tokens and `max_tags` tags. Radio groups are never split.
+
+    :param tags: List of tags (dicts from HTMLHandler.tags_to_list or LLM records).
+    :param token_budget: Target estimated tokens per chunk.
+    :param max_tags: Maximum number of tags per chunk, which bounds the structured output size.
+    :return: List of chunks, each a list of tags.
+    """
+    token_budget = token_budget or config.LLM_CHUNK_TOKEN_BUDGET
+    max_tags = max_tags or config.LLM_CHUNK_MAX_TAGS
+
+    units = group_radio_units(tags)
+    if not units:
+        return []
+    unit_costs = [sum(estimate_tag_tokens(tag) for tag in unit) for unit in units]
+    total_cost = sum(unit_costs)
+    num_chunks = max(math.ceil(total_cost / token_budget), math.ceil(len(tags) / max_tags), 1)
+    num_chunks = min(num_chunks, len(units))
+
+    chunks = [[]]
+    cumulative_cost = 0
+    for unit, cost in zip(units, unit_costs):
+        # Close the chunk once this unit's midpoint crosses the next even split boundary
+        boundary = total_cost * len(chunks) / num_chunks
+        too_many_tags = len(chunks[-1]) + len(unit) > max_tags
+        if chunks[-1] and (too_many_tags or (len(chunks) < num_chunks and cumulative_cost + cost / 2 > boundary)):
+            chunks.append([])
+        chunks[-1].extend(unit)
+        cumulative_cost += cost
+    return chunks
@@ -0,0 +1,104 @@
+import os
+
+# Model used for every LLM call made by the backend.
+LLM_MODEL_NAME = os.environ.get("APLORA_LLM_MODEL", "gpt-4o-mini")
+
+# Target estimated prompt tokens per chunk of tags; the chunk count follows from the form size.
+LLM_CHUNK_TOKEN_BUDGET = int(os.environ.get("APLORA_LLM_CHUNK_TOKEN_BUDGET", 2000))
+
+# Maximum number of tags per chunk, which bounds the size of the structured output.
+LLM_CHUNK_MAX_TAGS = int(os.environ.get("APLORA_LLM_CHUNK_MAX_TAGS", 20))
+
+# Maximum number of chunk requests allowed in flight at the same time.
+LLM_MAX_CONCURRENCY = int(os.environ.get("APLORA_LLM_MAX_CONCURRENCY", 4))
+
+# Feed each chunk into the relevance stage as soon as its summary returns,
+# instead of waiting for every summary chunk first.
+PIPELINED_STEP_1 = os.environ.get("APLORA_PIPELINED_STEP_1", "1") == "1"
+
+# Persistent cache of relevance answers keyed by field signature and context document hash.
+ANSWER_CACHE_ENABLED = os.environ.get("APLORA_ANSWER_CACHE", "1") == "1"
+ANSWER_CACHE_PATH = os.environ.get("APLORA_ANSWER_CACHE_PATH", "./answer_cache.sqlite3")
+ANSWER_CACHE_TTL_SECONDS = float(os.environ.get("APLORA_ANSWER_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("APLORA_ANSWER_CACHE_MAX_ENTRIES", 10000))
+
+# Send only the context passages relevant to each chunk or dropdown instead of the whole document.
+CONTEXT_RETRIEVAL_ENABLED = os.environ.get("APLORA_CONTEXT_RETRIEVAL", "1") == "1"
+CONTEXT_TOP_K = int(os.environ.get("APLORA_CONTEXT_TOP_K", 6))
+CONTEXT_PASSAGE_CHARS = int(os.environ.get("APLORA_CONTEXT_PASSAGE_CHARS", 500))
+
+# Tags classified from their attributes with at least this confidence skip the summarize_tags LLM stage.
+RULE_CLASSIFIER_MIN_CONFIDENCE = float(os.environ.get("APLORA_RULE_CLASSIFIER_MIN_CONFIDENCE", 0.85))
+
+# Fill fields with standard autocomplete tokens straight from the profile compiled from the context document.
+PROFILE_FAST_PATH_ENABLED = os.environ.get("APLORA_PROFILE_FAST_PATH", "1") == "1"
+
+# BeautifulSoup parser backend for rendered pages: "html.parser" or the faster "lxml".
+HTML_PARSER = os.environ.get("APLORA_HTML_PARSER", "html.parser")
+
+# Skip building a tree for <head>; only <body> holds form controls and their surrounding text.
+# Off by default: the SoupStrainer filtering costs more than it saves. In check_parser_conformance
+# lxml got slower with it (58 vs 28.5 ms and 1718 vs 1398 ms) and html.parser gained nothing.
+HTML_PARSE_BODY_ONLY = os.environ.get("APLORA_HTML_PARSE_BODY_ONLY", "0") == "1"
+
+# Drop scripts, styles, inline svg, noscript, iframes, comments and base64 data URIs from rendered pages
+# in one pass before they are parsed; none of them hold form controls or visible text.
+HTML_PRUNE = os.environ.get("APLORA_HTML_PRUNE", "1") == "1"
+
+# Minimum similarity for the fuzzy fallback when looking up an option's text in the page.
+FUZZY_TEXT_MIN_SCORE = float(os.environ.get("APLORA_FUZZY_TEXT_MIN_SCORE", 0.75))
+# How far the fuzzy match has to score above the next best option text; closer calls are left unmatched.
+FUZZY_TEXT_MIN_MARGIN = float(os.environ.get("APLORA_FUZZY_TEXT_MIN_MARGIN", 0.1))
+
+# On-disk cache of whole run_step_1 plans keyed by form structure fingerprint and context hash.
+PLAN_CACHE_ENABLED = os.environ.get("APLORA_PLAN_CACHE", "1") == "1"
+PLAN_CACHE_PATH = os.environ.get("APLORA_PLAN_CACHE_PATH", "./plan_cache.sqlite3")
+PLAN_CACHE_TTL_SECONDS = float(os.environ.get("APLORA_PLAN_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+PLAN_CACHE_MAX_ENTRIES = int(os.environ.get("APLORA_PLAN_CACHE_MAX_ENTRIES", 500))
+
+# Send all fills of a run as one versioned 'fill_batch' event instead of one event per field.
+FILL_BATCH_ENABLED = os.environ.get("APLORA_FILL_BATCH", "1") == "1"
+
+# Emit the text, radio and checkbox fills of each chunk as soon as it resolves, instead of after the whole plan.
+# Only applies to the pipelined step 1; custom dropdowns and native selects are still sent at the end.
+STREAM_FILLS = os.environ.get("APLORA_STREAM_FILLS", "1") == "1"
+
+# new_work jobs run on a bounded worker pool; submissions beyond the queue depth limit are rejected.
+JOB_WORKERS = int(os.environ.get("APLORA_JOB_WORKERS", 4))
+JOB_MAX_QUEUE_DEPTH = int(os.environ.get("APLORA_JOB_MAX_QUEUE_DEPTH", 16))
+
+# Workflow runners kept for later /api/select_option calls: idle time to live, count limit and estimated byte budget.
+STATE_TTL_SECONDS = float(os.environ.get("APLORA_STATE_TTL_SECONDS", 3600))
+STATE_MAX_RUNNERS = int(os.environ.get("APLORA_STATE_MAX_RUNNERS", 200))
+STATE_MAX_BYTES = int(os.environ.get("APLORA_STATE_MAX_BYTES", 512 * 1024 * 1024))
+
+# Dropdown options matched locally (normalization, synonym tables, fuzzy scoring) at this confidence skip the LLM.
+OPTION_MATCH_MIN_SCORE = float(os.environ.get("APLORA_OPTION_MATCH_MIN_SCORE", 0.85))
+
+# LLM gateway: per-model admission budgets (0 disables a bucket), retries with jittered backoff and call timeout.
+LLM_TOKENS_PER_MINUTE = int(os.environ.get("APLORA_LLM_TOKENS_PER_MINUTE", 200000))
+LLM_REQUESTS_PER_MINUTE = int(os.environ.get("APLORA_LLM_REQUESTS_PER_MINUTE", 500))
+LLM_MAX_RETRIES = int(os.environ.get("APLORA_LLM_MAX_RETRIES", 4))
+LLM_BACKOFF_BASE_SECONDS = float(os.environ.get("APLORA_LLM_BACKOFF_BASE_SECONDS", 1.0))
+LLM_BACKOFF_MAX_SECONDS = float(os.environ.get("APLORA_LLM_BACKOFF_MAX_SECONDS", 30.0))
+LLM_TIMEOUT_SECONDS = float(os.environ.get("APLORA_LLM_TIMEOUT_SECONDS", 60.0))
+
+# Record LLM outputs to, or replay them from, a JSONL file keyed by prompt hash: "record", "replay" or "" (off).
+LLM_RECORD_MODE = os.environ.get("APLORA_LLM_RECORD_MODE", "")
+LLM_RECORDINGS_PATH = os.environ.get("APLORA_LLM_RECORDINGS_PATH", "./llm_recordings.jsonl")
+LLM_REPLAY_LATENCY_SECONDS = float(os.environ.get("APLORA_LLM_REPLAY_LATENCY_SECONDS", 0.0))
+
+# Level of the structured (JSON line) logs; DEBUG also logs whole tag lists and every emitted fill.
+LOG_LEVEL = os.environ.get("APLORA_LOG_LEVEL", "INFO").upper()
+
+# Opt-in run traces: parsed tags, plans, emitted actions and timings, appended per work_id as gzip JSONL
+# by a background thread, with age and total size retention.
+TRACE_ENABLED = os.environ.get("APLORA_TRACE", "0") == "1"
+TRACE_DIR = os.environ.get("APLORA_TRACE_DIR", "./traces")
+TRACE_MAX_BYTES = int(os.environ.get("APLORA_TRACE_MAX_BYTES", 256 * 1024 * 1024))
+TRACE_MAX_AGE_SECONDS = float(os.environ.get("APLORA_TRACE_MAX_AGE_SECONDS", 7 * 24 * 3600))
+TRACE_QUEUE_SIZE = int(os.environ.get("APLORA_TRACE_QUEUE_SIZE", 10000))
+
+# Largest new_work or select_option payload accepted once decompressed; compressed clients can send
+# pages far beyond the socket buffer limit, so this bounds what a small compressed payload may expand to.
+MAX_DECOMPRESSED_BYTES = int(os.environ.get("APLORA_MAX_DECOMPRESSED_BYTES", 64 * 1024 * 1024))
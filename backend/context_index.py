@@ -0,0 +1,106 @@
+import hashlib
+import math
+import re
+import threading
+from collections import Counter
+
+import config
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text: str):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def split_passages(text: str, max_chars: int):
+    """
+    Split a context document into passages of at most about `max_chars` characters.
+    Paragraphs are kept together where possible; longer paragraphs are split on lines.
+    """
+    passages = []
+    current = ''
+    for paragraph in re.split(r'\n\s*\n', text):
+        for line in paragraph.splitlines() if len(paragraph) > max_chars else [paragraph]:
+            line = line.strip()
+            if not line:
+                continue
+            if current and len(current) + len(line) + 1 > max_chars:
+                passages.append(current)
+                current = ''
+            current = f"{current}\n{line}" if current else line
+        if current and len(paragraph) <= max_chars:
+            passages.append(current)
+            current = ''
+    if current:
+        passages.append(current)
+    return passages
+
+
+class BM25Index:
+    """In-process BM25 index over the passages of one context document."""
+    def __init__(self, passages, k1: float = 1.5, b: float = 0.75):
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(tokenize(passage)) for passage in passages]
+        self.lengths = [sum(freqs.values()) for freqs in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0
+        doc_freqs = Counter(term for freqs in self.term_freqs for term in freqs)
+        num_passages = len(passages)
+        self.idf = {
+            term: math.log(1 + (num_passages - freq + 0.5) / (freq + 0.5))
+            for term, freq in doc_freqs.items()
+        }
+
+    def score(self, query_terms, i):
+        freqs = self.term_freqs[i]
+        norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / (self.avg_length or 1))
+        total = 0.0
+        for term in query_terms:
+            freq = freqs.get(term)
+            if freq:
+                total += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+        return total
+
+    def search(self, query: str, top_k: int):
+        """
+        :return: Indices of the `top_k` best scoring passages with a positive score, best first.
+        """
+        query_terms = set(tokenize(query))
+        scores = [(self.score(query_terms, i), i) for i in range(len(self.passages))]
+        ranked = sorted((item for item in scores if item[0] > 0), key=lambda item: (-item[0], item[1]))
+        return [i for _, i in ranked[:top_k]]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_context_index(context_doc: str) -> BM25Index:
+    """
+    Return the BM25 index for `context_doc`, building it once per document version.
+    """
+    doc_hash = hashlib.sha256(context_doc.encode('utf-8')).hexdigest()
+    with _indexes_lock:
+        if doc_hash not in _indexes:
+            _indexes.clear()  # only the current context document is worth keeping
+            _indexes[doc_hash] = BM25Index(split_passages(context_doc, config.CONTEXT_PASSAGE_CHARS))
+        return _indexes[doc_hash]
+
+
+def select_context(context_doc: str, query: str, top_k: int = None) -> str:
+    """
+    Return the passages of `context_doc` most relevant to `query`, in document order.
+    The full document is returned when retrieval is disabled or the document is already small.
+    """
+    top_k = top_k or config.CONTEXT_TOP_K
+    if not config.CONTEXT_RETRIEVAL_ENABLED or not context_doc:
+        return context_doc
+    index = get_context_index(context_doc)
+    if len(index.passages) <= top_k + 1:
+        return context_doc
+    # The first passage is always kept: documents usually open with name and contact details,
+    # which field labels like "First Name" do not share any terms with.
+    selected = {0, *index.search(query, top_k)}
+    return '\n\n'.join(index.passages[i] for i in sorted(selected))
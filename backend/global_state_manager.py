@@ -1,10 +1,30 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import config
+from metrics import log_event
 from workflow_runner import WorkflowRunner
 
+logger = logging.getLogger(__name__)
+
 
 class GlobalStateManager:
-    def __init__(self):
-        # Internal dictionary to store WorkflowRunner objects
-        self.global_state = {}
+    """
+    Thread-safe store of WorkflowRunner objects by work_id.
+    Runners expire `ttl_seconds` after they were last used, and the least recently used runners are
+    evicted once more than `max_runners` are stored or their estimated size exceeds `max_bytes`.
+    Runners that are queued or still running, and the most recently used one, are never evicted.
+    """
+    def __init__(self, ttl_seconds: float = None, max_runners: int = None, max_bytes: int = None):
+        self.ttl_seconds = config.STATE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_runners = config.STATE_MAX_RUNNERS if max_runners is None else max_runners
+        self.max_bytes = config.STATE_MAX_BYTES if max_bytes is None else max_bytes
+        self.lock = threading.RLock()
+        # work_id -> [WorkflowRunner, last used timestamp, estimated size in bytes], least recently used first
+        self.global_state = OrderedDict()
+        self.evictions = 0
 
     def add_workflow_runner(self, work_id, workflow_runner):
         """
@@ -12,30 +32,57 @@ class GlobalStateManager:
         :param work_id: Unique identifier for the workflow.
         :param workflow_runner: Instance of WorkflowRunner to be added.
         """
-        self.global_state[work_id] = workflow_runner
+        size = workflow_runner.approximate_size()
+        with self.lock:
+            self.global_state[work_id] = [workflow_runner, time.time(), size]
+            self.global_state.move_to_end(work_id)
+            self._evict()
 
     def get_workflow_runner(self, work_id):
         """
-        Retrieve a WorkflowRunner object by work_id.
+        Retrieve a WorkflowRunner object by work_id and mark it as recently used.
+        :param work_id: Unique identifier for the workflow.
+        :return: WorkflowRunner instance or None if not found or expired.
+        """
+        with self.lock:
+            self._evict()
+            entry = self.global_state.get(work_id)
+            if entry is None:
+                return None
+            entry[1] = time.time()
+            self.global_state.move_to_end(work_id)
+            return entry[0]
+
+    def refresh_size(self, work_id):
+        """
+        Re-estimate the size of a runner after it changed, e.g. once it was compacted or its session DOM grew.
         :param work_id: Unique identifier for the workflow.
-        :return: WorkflowRunner instance or None if not found.
         """
-        return self.global_state.get(work_id, None)
+        with self.lock:
+            entry = self.global_state.get(work_id)
+        if entry is None:
+            return
+        size = entry[0].approximate_size()
+        with self.lock:
+            if self.global_state.get(work_id) is entry:
+                entry[2] = size
+                self._evict()
 
     def remove_workflow_runner(self, work_id):
         """
         Remove a WorkflowRunner object by work_id.
         :param work_id: Unique identifier for the workflow.
         """
-        if work_id in self.global_state:
-            del self.global_state[work_id]
+        with self.lock:
+            self.global_state.pop(work_id, None)
 
     def list_work_ids(self):
         """
         List all work_ids in the global state.
         :return: List of work_id keys.
         """
-        return list(self.global_state.keys())
+        with self.lock:
+            return list(self.global_state.keys())
 
     def has_workflow_runner(self, work_id):
         """
@@ -43,10 +90,40 @@ class GlobalStateManager:
         :param work_id: Unique identifier for the workflow.
         :return: True if work_id exists, False otherwise.
         """
-        return work_id in self.global_state
+        with self.lock:
+            return work_id in self.global_state
+
+    def total_bytes(self):
+        """
+        :return: Estimated size of all stored runners, in bytes.
+        """
+        with self.lock:
+            return sum(entry[2] for entry in self.global_state.values())
 
     def clear_all(self):
         """
         Clear all WorkflowRunner objects.
         """
-        self.global_state.clear()
+        with self.lock:
+            self.global_state.clear()
+
+    def _evict(self):
+        """Drop expired runners, then least recently used ones until the count and byte budgets hold."""
+        expired_before = time.time() - self.ttl_seconds
+        # The most recently used runner is kept even when it alone exceeds the budget
+        idle = [work_id for work_id, (runner, _, _) in list(self.global_state.items())[:-1] if not (runner.running or runner.queued)]
+        for work_id in idle:
+            if self.global_state[work_id][1] < expired_before:
+                self._drop(work_id)
+        total = sum(entry[2] for entry in self.global_state.values())
+        for work_id in idle:
+            if len(self.global_state) <= self.max_runners and total <= self.max_bytes:
+                break
+            if work_id in self.global_state:
+                total -= self.global_state[work_id][2]
+                self._drop(work_id)
+
+    def _drop(self, work_id):
+        del self.global_state[work_id]
+        self.evictions += 1
+        log_event(logger, logging.INFO, 'state_evicted', work_id=work_id)
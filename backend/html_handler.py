@@ -1,13 +1,103 @@
-from bs4 import BeautifulSoup, Tag
-from difflib import HtmlDiff
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer, Tag
+from difflib import HtmlDiff, SequenceMatcher
+import config
+import logging
+import re
+from html_pruner import prune_html
+from metrics import HTML_CHARS, log_event
+from structured_models.input_tag_summary import InputTagSummary
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r'\w+')
+NUMBER_PATTERN = re.compile(r'\d+')
+
+def normalize_text(text: str) -> str:
+    return ' '.join(text.casefold().split())
+
+
+def is_option_like(element) -> bool:
+    """
+    Whether an element (or its parent) looks like a selectable option of a native or custom dropdown.
+    """
+    for candidate in (element, getattr(element, 'parent', None)):
+        if not isinstance(candidate, Tag):
+            continue
+        if candidate.name in ('option', 'li') or candidate.get('role') in ('option', 'menuitem', 'menuitemradio'):
+            return True
+        marker = ' '.join(candidate.get('class') or []) + ' ' + str(candidate.get('id') or '')
+        if 'option' in marker.lower():
+            return True
+    return False
+
+
+def fuzzy_text_score(query: str, candidate: str) -> float:
+    """
+    Similarity of two normalized texts in [0, 1]: the better of token overlap and edit-distance ratio.
+    """
+    query_tokens, candidate_tokens = set(query.split()), set(candidate.split())
+    token_score = len(query_tokens & candidate_tokens) / len(query_tokens | candidate_tokens) if query_tokens | candidate_tokens else 0.0
+    return max(token_score, SequenceMatcher(None, query, candidate).ratio())
+
+
+def texts_compatible(query: str, candidate: str) -> bool:
+    """
+    Whether two normalized texts can name the same thing, however similar their characters are:
+    they must have the same numbers and the words of one must all appear in the other.
+    'male' is not 'female' and '2 years' is not '3 years', while 'prefer not to say' is 'i prefer not to say'.
+    """
+    if NUMBER_PATTERN.findall(query) != NUMBER_PATTERN.findall(candidate):
+        return False
+    query_words, candidate_words = set(WORD_PATTERN.findall(query)), set(WORD_PATTERN.findall(candidate))
+    return bool(query_words and candidate_words) and (query_words <= candidate_words or candidate_words <= query_words)
+
+
+def resolve_parser_backend(parser: str) -> str:
+    """
+    Validate a parser backend name, falling back to the built-in parser when lxml is not installed.
+    """
+    if parser not in HTMLHandler.parser_backends:
+        raise ValueError(f"Unknown html parser backend: {parser}")
+    if parser == 'lxml':
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            log_event(logger, logging.WARNING, 'html_parser_fallback', requested='lxml', used='html.parser')
+            return 'html.parser'
+    return parser
+
 
 class HTMLHandler:
     """Handles operations on HTML using BeautifulSoup."""
 
+    # bs4 tree builders; lxml is C-accelerated and several times faster on large pages.
+    parser_backends = ('html.parser', 'lxml')
+
+    form_control_tags = ('input', 'select', 'textarea', 'button')
+    # Rough memory of a parsed tree per character of source html, measured on saved pages (14x-42x).
+    tree_bytes_per_char = 30
+
     allowed_attrs = ['class', 'id', 'aria-describedby', 'aria-label', 'aria-haspopup', 'aria-required', 'data-automation-id',"autocomplete","name","type","value","required","role"]
 
-    def __init__(self, html: str):
-        self.soup = BeautifulSoup(html, "html.parser")
+    def __init__(self, html: str, parser: str = None, body_only: bool = None, prune: bool = None):
+        """
+        :param html: Rendered page html.
+        :param parser: Parser backend, one of `parser_backends`. Defaults to config.HTML_PARSER.
+        :param body_only: Build the tree for <body> only, skipping <head>. Defaults to config.HTML_PARSE_BODY_ONLY.
+        :param prune: Drop scripts, styles, svg, noscript, iframes, comments and base64 data URIs before
+            parsing (see html_pruner). Defaults to config.HTML_PRUNE.
+        """
+        self.parser = resolve_parser_backend(parser or config.HTML_PARSER)
+        body_only = config.HTML_PARSE_BODY_ONLY if body_only is None else body_only
+        self.prune = config.HTML_PRUNE if prune is None else prune
+        HTML_CHARS.inc(len(html), stage='received')
+        self.prune_stats = None
+        if self.prune:
+            html, self.prune_stats = prune_html(html)
+        HTML_CHARS.inc(len(html), stage='parsed')
+        self.soup = BeautifulSoup(html, self.parser, parse_only=SoupStrainer('body') if body_only else None)
+        self.source_chars = len(html)
+        self._text_index = None
     
     # def tags_to_list(self):
     #     '''
@@ -89,8 +179,15 @@ class HTMLHandler:
 
     #     return result_list
 
-    def tags_to_list(self):
+    def tags_to_list(self, text_window: int = 3, skip_blank_text: bool = False):
         '''
+        The text above/below each tag is taken from a single document-order pass over the page,
+        so each window is a constant-time slice instead of a tree walk per tag.
+
+        :param text_window: Number of neighbouring text nodes looked at on each side of a tag.
+        :param skip_blank_text: Count only non-blank text nodes towards the window. By default
+            blank text nodes take up window slots, matching find_all_previous/find_all_next(limit=...).
+
         Sample output:
         [
             {
@@ -133,8 +230,10 @@ class HTMLHandler:
 
         idx = 0
 
-        # Find all desired tags in the order they appear in the DOM
-        for tag in self.soup.find_all(['input', 'select', 'textarea', 'button']):
+        texts, controls = self._text_and_control_positions(skip_blank_text)
+
+        # Visit the desired tags in the order they appear in the DOM
+        for tag, position in controls:
             tag_dict = sanitize_element(tag)
 
             if tag.name == 'input':
@@ -168,20 +267,9 @@ class HTMLHandler:
             else:
                 continue  # Skip unsupported tags
 
-            # Find nearest text above
-            text_above = []
-            for prev in tag.find_all_previous(string=True, limit=3):
-                stripped = prev.strip()
-                if stripped:
-                    text_above.append(stripped[:min(120, len(stripped))])
-            text_above.reverse()  # Reverse to maintain top-to-bottom order
-
-            # Find nearest text below
-            text_below = []
-            for next_ in tag.find_all_next(string=True, limit=3):
-                stripped = next_.strip()
-                if stripped:
-                    text_below.append(stripped[:min(120, len(stripped))])
+            # Nearest text above, top-to-bottom, and nearest text below
+            text_above = [text for text in texts[max(0, position - text_window):position] if text]
+            text_below = [text for text in texts[position:position + text_window] if text]
 
             # Add metadata for all tags
             tag_dict["text_above_htmltag"] = text_above
@@ -195,6 +283,117 @@ class HTMLHandler:
 
         return result_list
 
+    @staticmethod
+    def classify_tag(tag):
+        """
+        Classify a tags_to_list entry from its attributes alone.
+        :param tag: Dictionary produced by tags_to_list.
+        :return: Tuple of (InputTagSummary, confidence between 0 and 1).
+        """
+        tag_type = tag.get('tag_type')
+        input_type = str(tag.get('type') or '').lower()
+        role = str(tag.get('role') or '').lower()
+        haspopup = str(tag.get('aria-haspopup') or '').lower()
+        autocomplete = str(tag.get('autocomplete') or '').lower()
+
+        if tag_type == 'select':
+            group, confidence = 'dropdown', 0.95
+        elif tag_type == 'textarea':
+            group, confidence = 'textarea', 0.95
+        elif input_type == 'checkbox':
+            group, confidence = 'checkbox', 0.95
+        elif input_type == 'radio':
+            group, confidence = 'radiobutton', 0.95
+        elif tag_type == 'button' or role == 'button' or input_type in ('submit', 'button', 'reset', 'image'):
+            group, confidence = 'button', 0.95
+        elif input_type == 'hidden':
+            group, confidence = 'hidden', 0.95
+        elif haspopup in ('true', 'listbox') or role == 'combobox':
+            group, confidence = 'dropdown', 0.9
+        elif input_type in ('email', 'tel', 'url', 'number', 'date', 'password', 'search'):
+            group, confidence = 'input text', 0.9
+        elif autocomplete and autocomplete not in ('on', 'off'):
+            group, confidence = 'input text', 0.9
+        elif input_type in ('', 'text'):
+            # Custom dropdowns often look like plain text inputs, so leave these to the LLM
+            group, confidence = 'input text', 0.6
+        else:
+            group, confidence = input_type, 0.5
+
+        label = tag.get('aria-label') or (tag.get('text_above_htmltag') or [None])[-1]
+        if not label:
+            confidence -= 0.2
+        details = ', '.join(f"{attr}={tag[attr]}" for attr in ('name', 'autocomplete', 'value') if tag.get(attr))
+        description = f"{group} for \"{label or 'unlabelled field'}\""
+        if group in ('radiobutton', 'checkbox') and tag.get('text_below_htmltag'):
+            # Option labels usually follow the control, the question precedes it
+            description = f"{group} \"{tag['text_below_htmltag'][0]}\" under \"{label or 'unlabelled question'}\""
+        if details:
+            description += f" ({details})"
+        return InputTagSummary(key=tag['key'], general_input_group=group, description=description), confidence
+
+    def classify_tags(self, tags, min_confidence: float):
+        """
+        Split tags into rule-based summaries and tags that still need an LLM summary.
+        :param tags: List of dictionaries produced by tags_to_list.
+        :param min_confidence: Rule results below this confidence are left to the LLM.
+        :return: Tuple of (list of InputTagSummary, list of unresolved tags).
+        """
+        summaries, unresolved = [], []
+        for tag in tags:
+            summary, confidence = self.classify_tag(tag)
+            if confidence >= min_confidence:
+                summaries.append(summary)
+            else:
+                unresolved.append(tag)
+        return summaries, unresolved
+
+    def _text_and_control_positions(self, skip_blank_text: bool):
+        """
+        Walk the document once, in order.
+        :return: Tuple of (list of stripped text nodes truncated to 120 characters, blank ones as ''
+            unless skipped; list of (form control tag, index of the first text node after its start)).
+        """
+        texts = []
+        controls = []
+        for node in self.soup.descendants:
+            if isinstance(node, NavigableString):
+                stripped = node.strip()
+                if stripped or not skip_blank_text:
+                    texts.append(stripped[:120])
+            elif node.name in self.form_control_tags:
+                controls.append((node, len(texts)))
+        return texts, controls
+
+    def merge_subtree(self, fragment):
+        """
+        Apply a newly rendered subtree (e.g. an opened dropdown menu) to the parsed page.
+        Top-level elements of the fragment replace the element with the same id when there is one,
+        otherwise they are appended to <body>.
+        :param fragment: outerHTML of the new subtree, or an HTMLHandler that already parsed it.
+            A parsed fragment is consumed: its elements are moved into this tree.
+        """
+        if not isinstance(fragment, HTMLHandler):
+            fragment = HTMLHandler(fragment, parser=self.parser, body_only=False, prune=self.prune)
+        container = fragment.soup.body or fragment.soup
+        root = self.soup.body or self.soup
+        for element in list(container.children):
+            existing = self.soup.find(id=element.get('id')) if isinstance(element, Tag) and element.get('id') else None
+            element = element.extract()
+            if existing is not None:
+                existing.replace_with(element)
+            else:
+                root.append(element)
+        fragment._text_index = None
+        self.source_chars += fragment.source_chars
+        self._text_index = None
+
+    def approximate_size(self) -> int:
+        """
+        :return: Estimated memory held by the parsed tree, in bytes.
+        """
+        return self.source_chars * self.tree_bytes_per_char
+
     def get_input_elements(self):
         """
         Extract all input elements from the HTML.
@@ -203,13 +402,66 @@ class HTMLHandler:
         inputs = self.soup.find_all("input")
         return [dict(inp.attrs) for inp in inputs]
     
+    def _build_text_index(self):
+        """
+        Index every non-empty text node once per parse.
+        :return: Tuple of (stripped text -> first node, normalized text -> first node,
+            list of (normalized text, node) for text inside option-like elements).
+        """
+        exact, normalized, options = {}, {}, []
+        for node in self.soup.descendants:
+            if not isinstance(node, NavigableString):
+                continue
+            stripped = node.strip()
+            if not stripped:
+                continue
+            exact.setdefault(stripped, node)
+            normalized_text = normalize_text(stripped)
+            normalized.setdefault(normalized_text, node)
+            if is_option_like(node.parent):
+                options.append((normalized_text, node))
+        return exact, normalized, options
+
+    def find_text_node(self, search_text: str):
+        """
+        Find the first text node showing `search_text`.
+        Exact (stripped) matches win, then matches ignoring case and whitespace, then the best fuzzy
+        match among option-like elements. A fuzzy match must be compatible with `search_text` (see
+        texts_compatible), score at least config.FUZZY_TEXT_MIN_SCORE and beat every other option
+        text by config.FUZZY_TEXT_MIN_MARGIN.
+        :return: NavigableString or None.
+        """
+        if self._text_index is None:
+            self._text_index = self._build_text_index()
+        exact, normalized, options = self._text_index
+        search_stripped = search_text.strip()
+        if search_stripped in exact:
+            return exact[search_stripped]
+        search_normalized = normalize_text(search_stripped)
+        if search_normalized in normalized:
+            return normalized[search_normalized]
+        scores = {}
+        best_score, best_node, best_text = 0.0, None, None
+        for option_text, node in options:
+            if option_text not in scores:
+                scores[option_text] = fuzzy_text_score(search_normalized, option_text)
+            score = scores[option_text]
+            if score > best_score and texts_compatible(search_normalized, option_text):
+                best_score, best_node, best_text = score, node, option_text
+        runner_up = max((score for text, score in scores.items() if text != best_text), default=0.0)
+        if best_score >= config.FUZZY_TEXT_MIN_SCORE and best_score - runner_up >= config.FUZZY_TEXT_MIN_MARGIN:
+            log_event(logger, logging.INFO, 'fuzzy_text_match', search_text=search_text,
+                      matched=best_node.strip(), score=round(best_score, 2))
+            return best_node
+        return None
+
     def get_element_with_text(self, search_text: str):
         """
         Get the element containing a given text and its allowed attributes.
         :param search_text: Text to search for.
         :return: Dictionary of allowed attributes and related information, or None if not found.
         """
-        element = self.soup.find(string=lambda text: search_text.strip()==text.strip() if text else False)
+        element = self.find_text_node(search_text)
         if not element:
             return None
 
@@ -231,8 +483,8 @@ class HTMLHandler:
 
         # Add additional fields
         result.update({
-            'key': f"element_{element.sourceline if hasattr(element, 'sourceline') else 0}",  # Example key generation
-            'idx': element.sourceline if hasattr(element, 'sourceline') else 0,
+            'key': f"element_{getattr(element, 'sourceline', None) or 0}",  # Example key generation
+            'idx': getattr(element, 'sourceline', None) or 0,
             'tag_type': element.name,
             'is_relevant_or_required': 'yes' if element.get('aria-required') == 'true' else 'no',
             'text_value': search_text,
@@ -249,7 +501,7 @@ class HTMLHandler:
         :param search_text: Text to search for.
         :return: Dictionary of allowed attributes and related information, or None if not found.
         """
-        element = self.soup.find(string=lambda text: search_text.strip()==text.strip() if text else False)
+        element = self.find_text_node(search_text)
         if not element or not element.parent:
             return None
 
@@ -283,7 +535,7 @@ class HTMLHandler:
         # Add additional fields
         result.update({
             'key': f"input_{len(result.get('text_above_htmltag', []))}", # Example key generation
-            'idx': parent.sourceline if hasattr(parent, 'sourceline') else 0,
+            'idx': getattr(parent, 'sourceline', None) or 0,
             'tag_type': parent.name,
             'is_relevant_or_required': 'yes' if parent.get('aria-required') == 'true' else 'no',
             'text_value': search_text,
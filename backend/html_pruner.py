@@ -0,0 +1,103 @@
+import re
+
+# Subtrees that hold no form controls and no visible text. Everything but svg is a raw text element in
+# serialized html: its content runs up to the first matching end tag.
+PRUNED_TAGS = ('script', 'style', 'svg', 'noscript', 'iframe')
+
+# What the scan stops at: a comment, the start of a pruned element or an inline base64 data URI.
+# Everything else is passed through without looking at it, so the scan runs at regex speed.
+# Tag names end at whitespace, '/' or '>' only: custom elements such as <style-guide> or <svg-icon> are kept.
+CANDIDATE_PATTERN = re.compile(
+    r'<!--|<(' + '|'.join(PRUNED_TAGS) + r')(?=[\s/>])|data:[^"\'\s,<>]*;base64,',
+    re.I,
+)
+# A start tag whose quoted attribute values may contain '>'.
+START_TAG_PATTERN = re.compile(r'<([a-zA-Z][^\s/>]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>')
+SVG_TAG_PATTERN = re.compile(r'<(/?)svg(?=[\s/>])((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>', re.I)
+END_TAG_PATTERNS = {name: re.compile(rf'</{name}\s*>', re.I) for name in PRUNED_TAGS}
+# Inline images and fonts (src, srcset, href, style url(...)) in an attribute value.
+DATA_URI_PATTERN = re.compile(r'data:[^"\'\s,<>]*;base64,[^"\'\s)>]*', re.I)
+
+
+def inside_tag(html: str, index: int) -> bool:
+    """
+    Whether `index` lies within a tag (i.e. in an attribute value) rather than in text.
+    Serialized html escapes '<' in text, so text never contains a literal tag start.
+    """
+    return html.rfind('<', 0, index) > html.rfind('>', 0, index)
+
+
+def iter_pruned_html(html: str, stats: dict = None):
+    """
+    Scan rendered html once, front to back, and yield the slices worth parsing: comments and
+    PRUNED_TAGS subtrees are skipped, base64 data URIs in attributes are replaced by an empty 'data:,'.
+    Text outside the pruned subtrees and every other tag are passed through unchanged.
+
+    :param stats: Optional dict that receives counts of the dropped subtrees ('script', 'comment', ...)
+        and replaced data URIs ('data_uri').
+    """
+    stats = {} if stats is None else stats
+    position = 0
+    kept_from = 0
+    while True:
+        match = CANDIDATE_PATTERN.search(html, position)
+        if match is None:
+            break
+        start = match.start()
+        text = match.group(0)
+        if text.startswith('data:'):
+            if not inside_tag(html, start):
+                position = match.end()
+                continue
+            end, kind, replacement = DATA_URI_PATTERN.match(html, start).end(), 'data_uri', 'data:,'
+        elif inside_tag(html, start):
+            position = match.end()
+            continue
+        elif text == '<!--':
+            end = html.find('-->', match.end())
+            end, kind, replacement = (len(html) if end == -1 else end + 3), 'comment', ''
+        else:
+            start_tag = START_TAG_PATTERN.match(html, start)
+            if start_tag is None:
+                position = match.end()
+                continue
+            kind = match.group(1).lower()
+            end, replacement = subtree_end(html, kind, start_tag), ''
+        yield html[kept_from:start]
+        yield replacement
+        stats[kind] = stats.get(kind, 0) + 1
+        kept_from = position = end
+    yield html[kept_from:]
+
+
+def subtree_end(html: str, name: str, start_tag) -> int:
+    """
+    :return: Index just past the end tag closing the element opened by `start_tag`, or the end of the html.
+    """
+    if name != 'svg':
+        end_tag = END_TAG_PATTERNS[name].search(html, start_tag.end())
+        return end_tag.end() if end_tag else len(html)
+    if start_tag.group(2).rstrip().endswith('/'):
+        return start_tag.end()
+    # Inline svg can nest further svg elements
+    depth = 1
+    for tag in SVG_TAG_PATTERN.finditer(html, start_tag.end()):
+        if tag.group(1):
+            depth -= 1
+        elif not tag.group(2).rstrip().endswith('/'):
+            depth += 1
+        if depth == 0:
+            return tag.end()
+    return len(html)
+
+
+def prune_html(html: str):
+    """
+    Drop the parts of a rendered page that form extraction never looks at, before it is parsed.
+    :return: Tuple of (pruned html, stats dict with 'chars_in', 'chars_out' and the counts of dropped parts).
+    """
+    stats = {}
+    pruned = ''.join(iter_pruned_html(html, stats))
+    stats['chars_in'] = len(html)
+    stats['chars_out'] = len(pruned)
+    return pruned, stats
@@ -0,0 +1,135 @@
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from metrics import log_event
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """A unit of work submitted to the JobScheduler, identified by its work_id."""
+    def __init__(self, work_id, client_id, run, cancel=None):
+        self.work_id = work_id
+        self.client_id = client_id
+        self.run = run
+        self.cancel = cancel
+        self.status = 'queued'
+        self.cancel_requested = False
+        self.future = None
+
+
+class JobScheduler:
+    """
+    Runs jobs on a bounded worker pool so socket handlers can acknowledge work immediately.
+    At most `max_queue_depth` jobs wait for a worker; further submissions are rejected.
+    Status changes ('queued', 'running', 'done', 'failed', 'cancelled') are passed to `on_status`.
+    """
+    def __init__(self, max_workers: int, max_queue_depth: int, on_status=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='aplora-job')
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self.on_status = on_status
+        self.lock = threading.Lock()
+        self.jobs = {}
+
+    def submit(self, work_id, client_id, run, cancel=None) -> bool:
+        """
+        Queue `run()` for a worker.
+        :param client_id: The socket session that owns the job, used by cancel_client.
+        :param cancel: Called to stop the job cooperatively once it is running.
+        :return: False when the queue is full and the job was rejected.
+        """
+        job = Job(work_id, client_id, run, cancel)
+        with self.lock:
+            if self._queue_depth() >= self.max_queue_depth:
+                return False
+            self.jobs[work_id] = job
+            # Reported before the job is handed to a worker so 'queued' always precedes 'running'
+            self._set_status(job, 'queued')
+            job.future = self.executor.submit(self._run_job, job)
+        return True
+
+    def queue_depth(self) -> int:
+        """
+        :return: Number of jobs waiting for a worker.
+        """
+        with self.lock:
+            return self._queue_depth()
+
+    def _queue_depth(self):
+        return sum(job.status == 'queued' for job in self.jobs.values())
+
+    def get_status(self, work_id):
+        with self.lock:
+            job = self.jobs.get(work_id)
+        return job.status if job is not None else None
+
+    def cancel(self, work_id) -> bool:
+        """
+        Cancel a queued or running job. Running jobs are asked to stop through their `cancel` callable.
+        :return: True if the job was still active.
+        """
+        with self.lock:
+            job = self.jobs.get(work_id)
+            if job is None or job.status not in ('queued', 'running'):
+                return False
+            job.cancel_requested = True
+            dequeued = job.future.cancel()
+        if job.cancel is not None:
+            job.cancel()
+        if dequeued:
+            self._finish(job, 'cancelled')
+        return True
+
+    def cancel_client(self, client_id) -> int:
+        """
+        Cancel every active job of a client, e.g. when its socket disconnects.
+        :return: Number of jobs cancelled.
+        """
+        with self.lock:
+            work_ids = [job.work_id for job in self.jobs.values() if job.client_id == client_id]
+        return sum(self.cancel(work_id) for work_id in work_ids)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run_job(self, job):
+        if job.cancel_requested:
+            self._finish(job, 'cancelled')
+            return
+        self._set_status(job, 'running')
+        status = 'done'
+        try:
+            job.run()
+        except Exception:
+            log_event(logger, logging.ERROR, 'job_failed', work_id=job.work_id, traceback=traceback.format_exc())
+            status = 'failed'
+        self._finish(job, 'cancelled' if job.cancel_requested else status)
+
+    def _finish(self, job, status):
+        self._set_status(job, status)
+        with self.lock:
+            self.jobs.pop(job.work_id, None)
+
+    def _set_status(self, job, status):
+        job.status = status
+        if self.on_status is not None:
+            self.on_status(job, status)
+
+
+_job_scheduler = None
+_job_scheduler_lock = threading.Lock()
+
+
+def get_job_scheduler(on_status=None):
+    """
+    Return the process-wide job scheduler, creating it with `on_status` on first use.
+    """
+    global _job_scheduler
+    with _job_scheduler_lock:
+        if _job_scheduler is None:
+            _job_scheduler = JobScheduler(config.JOB_WORKERS, config.JOB_MAX_QUEUE_DEPTH, on_status)
+        return _job_scheduler
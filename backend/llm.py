@@ -2,24 +2,92 @@ from typing import Optional
 
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from pydantic import BaseModel, Field
-from structured_models.input_tags import InputTagDescriptionList
+from structured_models.input_tags import InputTagDescription, InputTagDescriptionList
 from structured_models.input_tag_summary import InputTagSummaryList
+from structured_models.select_option_choice import SelectOptionChoiceList
 from langchain_core.runnables import RunnableParallel
-from multiprocessing import Process, Queue
-import pprint
+import asyncio
+import threading
+import logging
+import time
 
 
 import os
 from langchain_openai import ChatOpenAI
+import config
+from chunk_planner import estimate_text_tokens, plan_chunks, radio_group_name
+from answer_cache import context_hash, field_signature, get_answer_cache, normalize_text
+from context_index import select_context
+from option_matcher import match_option, option_texts
+from llm_gateway import LLMGateway, get_gateway
+from llm_recorder import RecordReplayChatModel
+from metrics import (
+    CACHE_LOOKUPS, LLM_CALL_SECONDS, LLM_FAILURES, STAGE_SECONDS, log_event, observe_usage, timed,
+)
+
+logger = logging.getLogger(__name__)
+
+RELEVANCE_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "You are an expert extraction algorithm. "
+            "Only extract relevant information from the text. "
+            "If you do not know the value of an attribute asked to extract, "
+            "return null for the attribute's value.",
+        ),
+        ("human", " Here is the document you need to check relevancy from: {text}"),
+        ("human", " Here are the html tags. The tags are ordered as we would see on a html based page to fill forms. So you can take help from surrounding tags to make a decision: {input_tags}"),
+    ]
+)
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "You are an expert in HTML semantics and input tag interpretation. Your task is to analyze HTML input tags and summarize their purpose and type into instances of the `InputTagSummary` class. Each input tag is represented as a dictionary containing its attributes, such as `id`, `type`, `class`, `aria-*` attributes, and surrounding metadata. Your goal is to determine the general input group and provide a short, descriptive summary of the tag’s purpose so that further relevant data can be input.",
+        ),
+        ("human", " Here are the html tags. The tags are ordered as we would see on a html based page to fill forms. So you can take help from surrounding tags to make a decision: {input_tags}"),
+    ]
+)
+
+SELECT_OPTIONS_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "For every select tag, pick the option from its select_options that best matches the wanted answer. "
+            "Return the option's `value` exactly as it appears, one record per tag key.",
+        ),
+        ("human", " Here are the select tags with the wanted answer and their options: {select_tags}"),
+    ]
+)
+
+_shared_llms = {}
+_shared_llms_lock = threading.Lock()
+# One event loop for every LLM coroutine of the process. The shared clients pool their async
+# connections on the loop that opened them, so a fresh loop per call would leave them unusable.
+_llm_loop = None
+_llm_loop_lock = threading.Lock()
 
 
 class LLMHandler:
     """Handles interactions with the LLM."""
-    def __init__(self, model_name: str = "gpt-4o-mini"):
-        self.llm = ChatOpenAI(model_name=model_name)
+    def __init__(self, model_name: str = config.LLM_MODEL_NAME, llm=None, max_concurrency: Optional[int] = None):
+        self.llm = llm if llm is not None else get_shared_llm(model_name)
+        # Every call goes through the gateway for rate limiting and retries
+        self.gateway = get_gateway(model_name, self.llm) if llm is None else LLMGateway(self.llm)
+        self.max_concurrency = max_concurrency or config.LLM_MAX_CONCURRENCY
+        self.chunk_reports = []
+        # Chunks left unanswered by _run_in_parallel, and chunks the LLM answered with no tags at all
+        self.failed_chunks = 0
+        self.empty_chunks = 0
     
-    def evaluate_input_relevance(self,context_doc,input_tags):
+    def evaluate_input_relevance(self,context_doc,input_tags,html_tags=None):
         '''
+            When `html_tags` (the HTMLHandler.tags_to_list entries for `input_tags`) are given,
+            fields already answered for the same context document are served from the answer cache
+            and only the misses are sent to the LLM.
+
             output example:
 
             is_relevant='yes' input_type='text' key='input_2' text_value='vineet.gandham@tamu.edu'
@@ -35,47 +103,100 @@ class LLMHandler:
             is_relevant='yes' input_type='text' key='textarea_1' text_value='Note: i would need sponsorship.'
             is_relevant='no' input_type='text' key='textarea_2' text_value=None
         '''
-        prompt_template = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "You are an expert extraction algorithm. "
-                    "Only extract relevant information from the text. "
-                    "If you do not know the value of an attribute asked to extract, "
-                    "return null for the attribute's value.",
-                ),
-                ("human", " Here is the document you need to check relevancy from: {text}"),
-                ("human", " Here are the html tags. The tags are ordered as we would see on a html based page to fill forms. So you can take help from surrounding tags to make a decision: {input_tags}"),
-            ]
-        )
+        cached, misses = self._lookup_cached_answers(context_doc, input_tags, html_tags)
         # Function to split data and process in parallel
         splitted_list_name = "input_tags"
-        prompt_dict = {"text": context_doc,"input_tags": None}
-        res = self._run_in_parallel(input_tags,prompt_template,splitted_list_name,InputTagDescriptionList,prompt_dict)
-        print()
-        pprint.pprint(res)
+        prompt_dict = {"text": lambda chunk: context_for_tags(context_doc, chunk, html_tags),"input_tags": None}
+        # Summary records carry no name, so the chunks are planned on the html tags to keep radio groups together
+        html_by_key = {tag['key']: tag for tag in html_tags or []}
+        plan_tags = [html_by_key.get(tag_key(tag), tag) for tag in misses]
+        res = self._run_in_parallel(misses,RELEVANCE_PROMPT,splitted_list_name,InputTagDescriptionList,prompt_dict,plan_tags=plan_tags)
+        self._store_answers(context_doc, res, html_tags)
+        res = order_by_keys(input_tags, cached + res)
+        log_event(logger, logging.DEBUG, 'relevance_results', tags=res)
         return res
     
     def summarize_tags(self,input_tags):
-        prompt_template = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "You are an expert in HTML semantics and input tag interpretation. Your task is to analyze HTML input tags and summarize their purpose and type into instances of the `InputTagSummary` class. Each input tag is represented as a dictionary containing its attributes, such as `id`, `type`, `class`, `aria-*` attributes, and surrounding metadata. Your goal is to determine the general input group and provide a short, descriptive summary of the tag’s purpose so that further relevant data can be input.",
-                ),
-                ("human", " Here are the html tags. The tags are ordered as we would see on a html based page to fill forms. So you can take help from surrounding tags to make a decision: {input_tags}"),
-            ]
-        )
-        
         # Function to split data and process in parallel
         splitted_list_name = "input_tags"
         prompt_dict = {"input_tags": None}
-        res = self._run_in_parallel(input_tags,prompt_template,splitted_list_name,InputTagSummaryList,prompt_dict)
-        print()
-        pprint.pprint(res)
+        res = self._run_in_parallel(input_tags,SUMMARY_PROMPT,splitted_list_name,InputTagSummaryList,prompt_dict)
+        log_event(logger, logging.DEBUG, 'summary_results', tags=res)
         return res
+
+    async def aevaluate_input_relevance_chunk(self, context_doc, input_tags, semaphore=None, html_tags=None):
+        """
+        Evaluate relevance for a single chunk of summarized tags.
+        :param semaphore: Optional semaphore shared with other in-flight chunk requests.
+        :param html_tags: Optional tags_to_list entries for the chunk, used for the answer cache.
+        :return: List of InputTagDescription for the chunk.
+        """
+        # The answer cache (SQLite) and the context selection (BM25) block, so they run on worker threads
+        # instead of stalling the other chunks' requests on the shared LLM event loop
+        cached, misses = await asyncio.to_thread(self._lookup_cached_answers, context_doc, input_tags, html_tags)
+        res = []
+        if misses:
+            prompt_dict = {"text": await asyncio.to_thread(context_for_tags, context_doc, misses, html_tags)}
+            res = await self._ainvoke_chunk(misses, RELEVANCE_PROMPT, "input_tags", InputTagDescriptionList, prompt_dict, semaphore)
+            await asyncio.to_thread(self._store_answers, context_doc, res, html_tags)
+        return order_by_keys(input_tags, cached + res)
+
+    def _lookup_cached_answers(self, context_doc, input_tags, html_tags):
+        """
+        Split `input_tags` into cached InputTagDescriptions and the tags that still need the LLM.
+        A radio group is looked up as a whole: when any of its buttons misses the cache, all of them go to
+        the LLM together, so it never answers part of a group without seeing the cached choice.
+        """
+        answer_cache = get_answer_cache()
+        if answer_cache is None or not html_tags:
+            return [], list(input_tags)
+        signatures = {tag['key']: field_signature(tag) for tag in html_tags}
+        groups = {tag['key']: radio_group_name(tag) for tag in html_tags}
+        hits = answer_cache.get_many(signatures.values(), context_hash(context_doc))
+        answers = {tag_key(tag): hits.get(signatures.get(tag_key(tag))) for tag in input_tags}
+        missed_groups = {groups.get(key) for key, answer in answers.items() if answer is None} - {None}
+        cached, misses = [], []
+        for tag in input_tags:
+            answer = answers[tag_key(tag)]
+            if answer is None or groups.get(tag_key(tag)) in missed_groups:
+                misses.append(tag)
+            else:
+                cached.append(InputTagDescription(**{**answer, 'key': tag_key(tag)}))
+        CACHE_LOOKUPS.inc(len(cached), cache='answer', result='hit')
+        CACHE_LOOKUPS.inc(len(misses), cache='answer', result='miss')
+        log_event(logger, logging.DEBUG, 'answer_cache', hits=len(cached), misses=len(misses))
+        return cached, misses
+
+    def _store_answers(self, context_doc, input_descriptions, html_tags):
+        answer_cache = get_answer_cache()
+        if answer_cache is None or not html_tags:
+            return
+        signatures = {tag['key']: field_signature(tag) for tag in html_tags}
+        answer_cache.put_many(
+            {
+                signatures[desc.key]: desc.model_dump(exclude={'key'})
+                for desc in input_descriptions if desc.key in signatures
+            },
+            context_hash(context_doc),
+        )
+
+    async def asummarize_tags_chunk(self, input_tags, semaphore=None):
+        """
+        Summarize a single chunk of html tags.
+        :param semaphore: Optional semaphore shared with other in-flight chunk requests.
+        :return: List of InputTagSummary for the chunk.
+        """
+        return await self._ainvoke_chunk(input_tags, SUMMARY_PROMPT, "input_tags", InputTagSummaryList, {}, semaphore)
     
-    def select_drop_down(self,context_doc,desc,options):
+    @timed(STAGE_SECONDS, stage='select_drop_down')
+    def select_drop_down(self,context_doc,desc,options,answer=None):
+        '''
+            When the intended `answer` is known (e.g. the tag's text_value), the option is first
+            looked up with the local option matcher and the LLM is only asked when that is not confident.
+        '''
+        option = resolve_option_locally(answer, options, desc)
+        if option is not None:
+            return option_texts(option)[1]
         prompt_template = ChatPromptTemplate.from_messages(
             [
                 (
@@ -87,12 +208,16 @@ class LLMHandler:
                 ("human", "Here are the list of options : {options}"),
             ]
         )
+        context_doc = select_context(context_doc, f"{desc} {options}")
         prompt = prompt_template.invoke({'context_doc':context_doc,'desc':desc,'options':options})
-        res = self.llm.invoke(prompt)
-        return res.content
+        return self._invoke_text('select_drop_down', prompt).content
     
 
+    @timed(STAGE_SECONDS, stage='choose_option')
     def choose_option(self,context_description,options,option_selection_directions):
+        option = resolve_option_locally(context_description, options, context_description)
+        if option is not None:
+            return option_texts(option)[0]
         prompt_template = ChatPromptTemplate.from_messages(
             [
                 (
@@ -104,62 +229,267 @@ class LLMHandler:
             ]
         )
         prompt = prompt_template.invoke({'context_description':context_description,'options':options,'option_selection_directions':option_selection_directions})
-        res = self.llm.invoke(prompt)
-        return res.content
+        return self._invoke_text('choose_option', prompt).content
+
+    def _invoke_text(self, operation, prompt):
+        """
+        Send a plain text prompt through the gateway, recording its latency, token usage and failure.
+        :param operation: Name of the calling operation, used as the metrics label.
+        """
+        try:
+            with timed(LLM_CALL_SECONDS, operation=operation):
+                res = self.gateway.invoke(self.llm, prompt, estimate_text_tokens(prompt.to_string()))
+        except Exception:
+            LLM_FAILURES.inc(operation=operation)
+            raise
+        observe_usage(operation, res)
+        return res
     
     
-    def _run_in_parallel(self, result, prompt_template, splitted_list_name, schema,prompt_dict, num_processes=4):
+    @timed(STAGE_SECONDS, stage='choose_select_options')
+    def choose_select_options(self, select_tags, option_selection_directions=""):
+        """
+        Resolve the option of many native <select> tags with one structured call, or a few concurrent ones
+        when the option lists are long. Tags whose answer fails or is not one of their options fall back
+        to a `choose_option` call of their own.
+        :param select_tags: Tags from tags_to_list with `select_option_value` holding the wanted answer.
+        :param option_selection_directions: Passed on to the per-field fallback.
+        :return: Dictionary of tag key -> option value.
         """
-        Run processing in parallel using a configurable number of processes.
+        results = {}
+        items = []
+        for tag in select_tags:
+            option = resolve_option_locally(tag.get('select_option_value'), tag.get('select_options') or [], tag['key'])
+            if option is not None:
+                results[tag['key']] = option_texts(option)[0]
+                continue
+            items.append({'key': tag['key'], 'wanted': tag.get('select_option_value'), 'select_options': tag.get('select_options') or []})
+        if not items:
+            return results
+        chunk_results = run_coroutine(self._achoose_select_options(plan_chunks(items)))
+        chosen = {}
+        for chunk_result in chunk_results:
+            if isinstance(chunk_result, Exception):
+                log_event(logger, logging.WARNING, 'select_options_batch_failed', error=repr(chunk_result))
+                continue
+            chosen.update({choice.key: choice.option_value for choice in chunk_result})
+        for item in items:
+            value = match_option_value(chosen.get(item['key']), item['select_options'])
+            if value is None:
+                log_event(logger, logging.INFO, 'select_options_fallback', key=item['key'])
+                value = self.choose_option(item['wanted'], item['select_options'], option_selection_directions)
+            results[item['key']] = value
+        return results
+
+    async def _achoose_select_options(self, chunks):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.gather(*(
+            self._ainvoke_chunk(chunk, SELECT_OPTIONS_PROMPT, 'select_tags', SelectOptionChoiceList, {}, semaphore)
+            for chunk in chunks
+        ), return_exceptions=True)
+
+    def _run_in_parallel(self, result, prompt_template, splitted_list_name, schema,prompt_dict, num_chunks=None, plan_tags=None):
+        """
+        Run processing concurrently on the shared client, one request per chunk.
 
         Args:
             result (list): Input data to be processed.
             prompt_template: Prompt template for processing.
-            splitted_list_name: Additional prompt-related data.
+            splitted_list_name: Key of the prompt variable that receives each chunk.
             schema: Schema for processing.
-            num_processes (int): Number of parallel processes to use.
+            prompt_dict: Prompt variables shared by every chunk. A callable value is
+                called with the chunk to compute that variable per chunk.
+            num_chunks (int): Fixed number of chunks to split the input into.
+                Defaults to a token-budget plan from `chunk_planner.plan_chunks`.
+            plan_tags (list): Tags with the same keys as `result` to plan the chunks on, e.g. the html
+                tags of summary records, whose `name` keeps radio groups in one chunk.
 
         Returns:
-            list: Combined results from all processes.
-        """
-        # Split the result list into chunks
-        num_processes = min(num_processes, len(result))
-        chunk_size = len(result) // num_processes
-        chunks = [result[i:i + chunk_size] for i in range(0, len(result), chunk_size)]
-
-        # Handle edge case where result length is not divisible by num_processes
-        if len(result) % num_processes != 0:
-            chunks[-1].extend(result[num_processes * chunk_size:])
-
-        # Queues to collect results from each process
-        queues = [Queue() for _ in range(num_processes)]
-
-        # Create and start processes
-        processes = []
-        for i in range(num_processes):
-            process = Process(
-                target=process_chunk,
-                args=(chunks[i], prompt_template, splitted_list_name, schema, queues[i],prompt_dict, i + 1)
-            )
-            processes.append(process)
-            process.start()
-
-        # Wait for all processes to complete
-        for process in processes:
-            process.join()
-
-        # Collect results from all queues
-        results = [item for queue in queues for item in queue.get()]
+            list: Combined results from all chunks, in input order.
+        """
+        if num_chunks:
+            chunks = split_into_chunks(result, num_chunks)
+        elif plan_tags is not None:
+            by_key = {tag_key(tag): tag for tag in result}
+            chunks = [[by_key[tag_key(tag)] for tag in chunk] for chunk in plan_chunks(plan_tags)]
+        else:
+            chunks = plan_chunks(result)
+        chunk_results = run_coroutine(self._arun_chunks(chunks, prompt_template, splitted_list_name, schema, prompt_dict))
+        results = []
+        for chunk, chunk_result in zip(chunks, chunk_results):
+            if isinstance(chunk_result, Exception):
+                # One failed chunk leaves its tags unanswered instead of failing the whole run
+                log_event(logger, logging.WARNING, 'chunk_failed', stage=schema.__name__,
+                          num_tags=len(chunk), error=repr(chunk_result))
+                self.failed_chunks += 1
+                continue
+            results.extend(chunk_result)
         return results
 
+    async def _arun_chunks(self, chunks, prompt_template, splitted_list_name, schema, prompt_dict):
+        """
+        Send every chunk to the LLM with at most `max_concurrency` requests in flight.
+        Results are returned in the same order as `chunks`; a chunk that failed after the gateway's retries
+        is returned as its exception.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.gather(*(
+            self._ainvoke_chunk(chunk, prompt_template, splitted_list_name, schema, prompt_dict, semaphore)
+            for chunk in chunks
+        ), return_exceptions=True)
 
-    
-    # Function to process a chunk of data using the LLM
-def process_chunk(chunk,prompt_template,splitted_list_name,schema,queue,prompt_dict, chunk_id):
-    llm = ChatOpenAI(model_name="gpt-4o-mini")
-    structured_llm = llm.with_structured_output(schema=schema)
-    results = []
-    prompt = prompt_template.invoke({**prompt_dict,splitted_list_name:chunk})
-    result = structured_llm.invoke(prompt)  # Synchronous call
-    results.extend(result.tags)
-    queue.put(results)
\ No newline at end of file
+    async def _ainvoke_chunk(self, chunk, prompt_template, splitted_list_name, schema, prompt_dict, semaphore=None):
+        """
+        Send one chunk to the LLM and return the parsed list of tags.
+        """
+        semaphore = semaphore or asyncio.Semaphore(self.max_concurrency)
+        structured_llm = self.llm.with_structured_output(schema=schema, include_raw=True)
+        prompt_vars = {name: value(chunk) if callable(value) else value for name, value in prompt_dict.items()}
+        prompt = prompt_template.invoke({**prompt_vars, splitted_list_name: chunk})
+        start = time.perf_counter()
+        try:
+            async with semaphore:
+                result = await self.gateway.ainvoke(structured_llm, prompt, estimate_text_tokens(prompt.to_string()))
+            if result['parsing_error'] is not None:
+                raise result['parsing_error']
+        except Exception:
+            LLM_FAILURES.inc(operation=schema.__name__)
+            raise
+        finally:
+            LLM_CALL_SECONDS.observe(time.perf_counter() - start, operation=schema.__name__)
+        self._report_chunk_cost(schema, chunk, prompt, result['raw'], time.perf_counter() - start)
+        if chunk and not result['parsed'].tags:
+            self.empty_chunks += 1
+        return result['parsed'].tags
+
+    def _report_chunk_cost(self, schema, chunk, prompt, raw_message, seconds=None):
+        """
+        Record the planned (offline estimate) against the actual (provider reported) token cost of a chunk.
+        """
+        usage = getattr(raw_message, 'usage_metadata', None) or {}
+        report = {
+            'stage': schema.__name__,
+            'num_tags': len(chunk),
+            'planned_tokens': estimate_text_tokens(prompt.to_string()),
+            'actual_input_tokens': usage.get('input_tokens'),
+            'actual_output_tokens': usage.get('output_tokens'),
+            'seconds': seconds,
+        }
+        self.chunk_reports.append(report)
+        observe_usage(report['stage'], raw_message)
+        log_event(logger, logging.INFO, 'chunk_cost', **report)
+
+
+def get_shared_llm(model_name: str):
+    """
+    Return the process-wide chat client for `model_name`, creating it on first use.
+    Reusing the client keeps its HTTP connection pool warm across calls.
+    """
+    with _shared_llms_lock:
+        if model_name not in _shared_llms:
+            if config.LLM_RECORD_MODE == 'replay':
+                llm = RecordReplayChatModel(config.LLM_RECORDINGS_PATH, 'replay', latency=config.LLM_REPLAY_LATENCY_SECONDS)
+            else:
+                # Retries and timeouts are handled by the LLM gateway
+                llm = ChatOpenAI(model_name=model_name, max_retries=0, timeout=config.LLM_TIMEOUT_SECONDS)
+                if config.LLM_RECORD_MODE == 'record':
+                    llm = RecordReplayChatModel(config.LLM_RECORDINGS_PATH, 'record', inner=llm)
+            _shared_llms[model_name] = llm
+        return _shared_llms[model_name]
+
+
+def context_for_tags(context_doc, input_tags, html_tags=None):
+    """
+    Select the context passages relevant to a chunk of tags.
+    The html tags carry the label and surrounding text, so they are preferred as the query when available.
+    """
+    keys = {tag_key(tag) for tag in input_tags}
+    query_tags = [tag for tag in html_tags or [] if tag['key'] in keys] + list(input_tags)
+    return select_context(context_doc, ' '.join(str(tag) for tag in query_tags))
+
+
+def resolve_option_locally(answer, options, field):
+    """
+    Resolve an option with the deterministic option matcher and log which path decided the field.
+    :param field: Name of the field, used in the log line.
+    :return: The matched option, or None when the match is below config.OPTION_MATCH_MIN_SCORE.
+    """
+    index, score, method = match_option(answer, options)
+    resolved = index is not None and score >= config.OPTION_MATCH_MIN_SCORE
+    CACHE_LOOKUPS.inc(cache='option_matcher', result='hit' if resolved else 'miss')
+    log_event(logger, logging.DEBUG, 'option_match', field=field, method=method, score=round(score, 2), resolved=resolved)
+    return options[index] if resolved else None
+
+
+def match_option_value(answer, select_options):
+    """
+    Map an answer to the value of one of `select_options`, accepting an option's text as well as its value.
+    :return: The option value, or None if the answer matches no option.
+    """
+    if answer is None:
+        return None
+    for option in select_options:
+        if answer == option.get('value'):
+            return answer
+    normalized = normalize_text(answer)
+    for option in select_options:
+        if normalized in (normalize_text(option.get('value')), normalize_text(option.get('text'))):
+            return option.get('value')
+    return None
+
+
+def tag_key(tag):
+    return tag['key'] if isinstance(tag, dict) else tag.key
+
+
+def order_by_keys(input_tags, records):
+    """
+    Return `records` in the order of the `input_tags` they answer; records with unknown keys go last.
+    """
+    position = {tag_key(tag): i for i, tag in enumerate(input_tags)}
+    return sorted(records, key=lambda record: position.get(record.key, len(position)))
+
+
+def split_into_chunks(items, num_chunks):
+    """
+    Split `items` into at most `num_chunks` contiguous chunks whose sizes differ by at most one.
+    """
+    num_chunks = min(num_chunks, len(items))
+    if num_chunks <= 0:
+        return []
+    chunk_size, remainder = divmod(len(items), num_chunks)
+    chunks = []
+    start = 0
+    for i in range(num_chunks):
+        end = start + chunk_size + (1 if i < remainder else 0)
+        chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
+def get_llm_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide LLM event loop, starting it on a daemon thread on first use."""
+    global _llm_loop
+    with _llm_loop_lock:
+        if _llm_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='llm-event-loop', daemon=True).start()
+            _llm_loop = loop
+        return _llm_loop
+
+
+def run_coroutine(coro):
+    """
+    Run `coro` to completion from synchronous code on the shared LLM event loop, blocking the
+    calling thread until it finishes. Works from threads that run an event loop of their own.
+    :raises RuntimeError: When called from the LLM event loop itself, which would deadlock.
+    """
+    loop = get_llm_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_coroutine cannot be called from the LLM event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
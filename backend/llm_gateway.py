@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+
+import config
+from metrics import LLM_QUEUE_WAIT_SECONDS, log_event
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: request timeout, conflict, rate limit and server errors.
+RETRYABLE_STATUSES = (408, 409, 429)
+# Transport errors of the OpenAI client that carry no status code.
+RETRYABLE_ERROR_NAMES = ('APIConnectionError', 'APITimeoutError', 'TimeoutError')
+
+
+def is_closed_loop_error(error) -> bool:
+    """
+    Whether `error` or an error it was raised from reports "Event loop is closed": the client's pooled
+    connections belong to a loop that has gone away, so retrying on the same client cannot succeed.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, RuntimeError) and 'Event loop is closed' in str(error):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def is_retryable(error) -> bool:
+    if is_closed_loop_error(error):
+        return False
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in RETRYABLE_STATUSES or status >= 500
+    return isinstance(error, asyncio.TimeoutError) or type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `per_minute` tokens per minute, holding at most one minute's worth.
+    Callers reserve tokens up front and are told how long to wait before their reservation is covered,
+    so the bucket can be shared by threads running separate event loops.
+    """
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        :return: Seconds to wait before `amount` tokens are available.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= min(amount, self.capacity)
+            return max(0.0, -self.tokens / self.rate)
+
+
+class LLMGateway:
+    """
+    Admission control and retries for one chat model, shared by every LLMHandler in the process.
+    Each call reserves its estimated prompt tokens and one request from per-model token buckets
+    (tokens and requests per minute), then runs with a timeout. Rate limits (429), server errors and
+    timeouts are retried with jittered exponential backoff.
+    """
+    def __init__(self, llm, tokens_per_minute: float = None, requests_per_minute: float = None,
+                 max_retries: int = None, timeout: float = None):
+        self.llm = llm
+        self.model_label = getattr(llm, 'model_name', None) or type(llm).__name__
+        tokens_per_minute = config.LLM_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        requests_per_minute = config.LLM_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.max_retries = config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.timeout = timeout or config.LLM_TIMEOUT_SECONDS
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.queue_wait_seconds = 0.0
+        self.max_queue_wait_seconds = 0.0
+
+    def invoke(self, runnable, prompt, estimated_tokens: int):
+        """
+        Call `runnable.invoke(prompt)` through admission control and retries.
+        :param runnable: The chat model or a runnable derived from it (e.g. with_structured_output).
+        :param estimated_tokens: Estimated prompt tokens, reserved from the token bucket.
+        """
+        for attempt in range(self.max_retries + 1):
+            time.sleep(self._admit(estimated_tokens))
+            try:
+                return runnable.invoke(prompt)
+            except Exception as e:
+                time.sleep(self._backoff(e, attempt))
+
+    async def ainvoke(self, runnable, prompt, estimated_tokens: int):
+        """
+        Async counterpart of `invoke`; each attempt is cancelled after the gateway timeout.
+        """
+        for attempt in range(self.max_retries + 1):
+            await asyncio.sleep(self._admit(estimated_tokens))
+            try:
+                return await asyncio.wait_for(runnable.ainvoke(prompt), self.timeout)
+            except Exception as e:
+                await asyncio.sleep(self._backoff(e, attempt))
+
+    def _admit(self, estimated_tokens):
+        """
+        Reserve a request and the estimated tokens.
+        :return: Seconds to wait before sending.
+        """
+        wait = 0.0
+        if self.request_bucket is not None:
+            wait = max(wait, self.request_bucket.reserve(1))
+        if self.token_bucket is not None:
+            wait = max(wait, self.token_bucket.reserve(estimated_tokens))
+        with self.lock:
+            self.calls += 1
+            self.queue_wait_seconds += wait
+            self.max_queue_wait_seconds = max(self.max_queue_wait_seconds, wait)
+        LLM_QUEUE_WAIT_SECONDS.observe(wait, model=self.model_label)
+        if wait > 0:
+            log_event(logger, logging.INFO, 'llm_gateway_wait', seconds=round(wait, 3), estimated_tokens=estimated_tokens)
+        return wait
+
+    def _backoff(self, error, attempt):
+        """
+        :return: Seconds to sleep before retrying after `error`.
+        :raises: `error` when it is not retryable or the retries are used up.
+        """
+        if not is_retryable(error) or attempt >= self.max_retries:
+            with self.lock:
+                self.failures += 1
+            raise error
+        delay = min(config.LLM_BACKOFF_MAX_SECONDS, config.LLM_BACKOFF_BASE_SECONDS * 2 ** attempt)
+        delay = random.uniform(delay / 2, delay)
+        with self.lock:
+            self.retries += 1
+        log_event(logger, logging.WARNING, 'llm_gateway_retry', error=type(error).__name__,
+                  attempt=attempt + 1, delay_seconds=round(delay, 3))
+        return delay
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'calls': self.calls,
+                'retries': self.retries,
+                'failures': self.failures,
+                'queue_wait_seconds': self.queue_wait_seconds,
+                'max_queue_wait_seconds': self.max_queue_wait_seconds,
+            }
+
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+
+def get_gateway(model_name: str, llm):
+    """
+    Return the process-wide gateway for `model_name`, creating it around `llm` on first use.
+    A different `llm` object (e.g. a fake swapped in by a benchmark) gets a fresh gateway.
+    """
+    with _gateways_lock:
+        gateway = _gateways.get(model_name)
+        if gateway is None or gateway.llm is not llm:
+            gateway = _gateways[model_name] = LLMGateway(llm)
+        return gateway
@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+
+from langchain_core.messages import AIMessage
+
+
+class RecordingMissing(Exception):
+    """Raised in replay mode when no recording exists for a prompt."""
+
+
+class RecordReplayChatModel:
+    """
+    Chat-model wrapper that records LLM outputs keyed by a hash of the prompt (and structured output schema),
+    or replays them without any API call.
+
+    In 'record' mode every call goes to `inner` and its output is appended to the JSONL file at `path`.
+    In 'replay' mode outputs are served from that file after sleeping `latency` seconds, so pipeline
+    changes can be measured offline and deterministically. Prompts without a recording raise RecordingMissing.
+    """
+    def __init__(self, path: str, mode: str = 'replay', inner=None, latency: float = 0.0):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown recording mode: {mode}")
+        if mode == 'record' and inner is None:
+            raise ValueError("Recording needs the model to record from")
+        self.path = path
+        self.mode = mode
+        self.inner = inner
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.recordings = {}
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.recordings[record['key']] = record
+
+    def with_structured_output(self, schema, include_raw=False):
+        return RecordedStructuredModel(self, schema, include_raw)
+
+    def invoke(self, prompt):
+        if self.mode == 'record':
+            return self._record_text(prompt, self.inner.invoke(prompt))
+        time.sleep(self.latency)
+        return self._replay_text(prompt)
+
+    async def ainvoke(self, prompt):
+        if self.mode == 'record':
+            return self._record_text(prompt, await self.inner.ainvoke(prompt))
+        await asyncio.sleep(self.latency)
+        return self._replay_text(prompt)
+
+    def _record_text(self, prompt, message):
+        self.store(prompt, None, {'content': message.content, 'usage': getattr(message, 'usage_metadata', None)})
+        return message
+
+    def _replay_text(self, prompt):
+        record = self.lookup(prompt, None)
+        return AIMessage(content=record['content'], usage_metadata=record['usage'])
+
+    def key(self, prompt, schema) -> str:
+        schema_name = schema.__name__ if schema is not None else 'text'
+        return hashlib.sha256(f"{schema_name}\n{prompt.to_string()}".encode('utf-8')).hexdigest()
+
+    def lookup(self, prompt, schema) -> dict:
+        record = self.recordings.get(self.key(prompt, schema))
+        with self.lock:
+            if record is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if record is None:
+            raise RecordingMissing(f"No recording for this {schema.__name__ if schema else 'text'} prompt")
+        return record
+
+    def store(self, prompt, schema, output: dict):
+        record = {'key': self.key(prompt, schema), **output}
+        with self.lock:
+            self.recordings[record['key']] = record
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(record) + '\n')
+
+
+class RecordedStructuredModel:
+    """The with_structured_output counterpart of RecordReplayChatModel."""
+    def __init__(self, recorder: RecordReplayChatModel, schema, include_raw=False):
+        self.recorder = recorder
+        self.schema = schema
+        self.include_raw = include_raw
+
+    def invoke(self, prompt):
+        if self.recorder.mode == 'record':
+            return self._record(prompt, self._inner().invoke(prompt))
+        time.sleep(self.recorder.latency)
+        return self._replay(prompt)
+
+    async def ainvoke(self, prompt):
+        if self.recorder.mode == 'record':
+            return self._record(prompt, await self._inner().ainvoke(prompt))
+        await asyncio.sleep(self.recorder.latency)
+        return self._replay(prompt)
+
+    def _inner(self):
+        return self.recorder.inner.with_structured_output(schema=self.schema, include_raw=True)
+
+    def _record(self, prompt, result):
+        # Failed parses are not recorded, so replay never serves them
+        if result['parsing_error'] is None:
+            self.recorder.store(prompt, self.schema, {
+                'parsed': result['parsed'].model_dump(exclude_unset=True),
+                'usage': getattr(result['raw'], 'usage_metadata', None),
+            })
+        return result if self.include_raw else result['parsed']
+
+    def _replay(self, prompt):
+        record = self.recorder.lookup(prompt, self.schema)
+        parsed = self.schema.model_validate(record['parsed'])
+        if not self.include_raw:
+            return parsed
+        return {'raw': AIMessage(content='', usage_metadata=record['usage']), 'parsed': parsed, 'parsing_error': None}
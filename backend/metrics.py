@@ -0,0 +1,183 @@
+import bisect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; covers a rule-classified chunk up to a slow, retried LLM call.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Tokens per LLM call.
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+
+def format_labels(label_names, label_values, extra=()):
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = [
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    ]
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def format_value(value) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """A named metric with one series per combination of label values, rendered in the Prometheus text format."""
+    kind = None
+
+    def __init__(self, name: str, help_text: str, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def _label_values(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            for label_values, value in sorted(self.series.items()):
+                lines += self._render_series(label_values, value)
+        return lines
+
+    def _render_series(self, label_values, value):
+        return [f"{self.name}{format_labels(self.label_names, label_values)} {format_value(value)}"]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._label_values(labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._label_values(labels)
+        with self.lock:
+            self.series[key] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, label_names=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._label_values(labels)
+        with self.lock:
+            # Per series: [count per bucket (last one is +Inf), sum]
+            series = self.series.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def _render_series(self, label_values, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else format_value(bound)
+            lines.append(f"{self.name}_bucket{format_labels(self.label_names, label_values, [('le', le)])} {cumulative}")
+        labels = format_labels(self.label_names, label_values)
+        lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics of the process, rendered together for the /metrics endpoint."""
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return '\n'.join(line for metric in self.metrics for line in metric.render()) + '\n'
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    'aplora_stage_seconds', 'Wall time of workflow stages and emit phases.', ('stage',)
+))
+LLM_CALL_SECONDS = registry.register(Histogram(
+    'aplora_llm_call_seconds', 'Wall time of LLM calls, including gateway waits and retries.', ('operation',)
+))
+LLM_TOKENS = registry.register(Histogram(
+    'aplora_llm_tokens', 'Prompt and completion tokens per LLM call, as reported by the provider.',
+    ('operation', 'kind'), TOKEN_BUCKETS
+))
+LLM_QUEUE_WAIT_SECONDS = registry.register(Histogram(
+    'aplora_llm_queue_wait_seconds', 'Time LLM calls waited in the gateway for rate limit budget, per attempt.', ('model',)
+))
+LLM_FAILURES = registry.register(Counter(
+    'aplora_llm_failures_total', 'LLM calls that failed after the gateway retries.', ('operation',)
+))
+CACHE_LOOKUPS = registry.register(Counter(
+    'aplora_cache_lookups_total', 'Plan cache, answer cache and local option matcher lookups.', ('cache', 'result')
+))
+HTML_CHARS = registry.register(Counter(
+    'aplora_html_chars_total', 'Characters of html received, and left to parse after pruning.', ('stage',)
+))
+PAYLOAD_BYTES = registry.register(Counter(
+    'aplora_payload_bytes_total', 'Bytes of new_work and select_option payloads on the wire and once decoded.',
+    ('channel', 'encoding', 'kind')
+))
+JOB_QUEUE_DEPTH = registry.register(Gauge('aplora_job_queue_depth', 'new_work jobs waiting for a worker.'))
+STATE_RUNNERS = registry.register(Gauge('aplora_state_runners', 'Workflow runners kept in the global state.'))
+STATE_BYTES = registry.register(Gauge('aplora_state_bytes', 'Estimated size of the workflow runners kept in the global state.'))
+
+
+@contextmanager
+def timed(histogram: Histogram, **labels):
+    """Observe the wall time of the `with` block in `histogram`, also when the block raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+
+def observe_usage(operation: str, message):
+    """
+    Record the provider-reported token usage of an LLM response.
+    :param message: The raw AIMessage; responses without usage metadata are ignored.
+    """
+    usage = getattr(message, 'usage_metadata', None) or {}
+    if usage.get('input_tokens') is not None:
+        LLM_TOKENS.observe(usage['input_tokens'], operation=operation, kind='prompt')
+    if usage.get('output_tokens') is not None:
+        LLM_TOKENS.observe(usage['output_tokens'], operation=operation, kind='completion')
+
+
+def _json_default(value):
+    if hasattr(value, 'model_dump'):
+        return value.model_dump()
+    return str(value)
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields):
+    """
+    Log `event` with its fields as one JSON line, serializing them only when `level` is enabled,
+    so large payloads such as whole tag lists cost nothing on the hot path by default.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, json.dumps({'event': event, **fields}, default=_json_default))
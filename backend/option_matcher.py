@@ -0,0 +1,143 @@
+import re
+
+from answer_cache import normalize_text
+from html_handler import fuzzy_text_score, texts_compatible
+
+US_STATES = {
+    'al': 'alabama', 'ak': 'alaska', 'az': 'arizona', 'ar': 'arkansas', 'ca': 'california', 'co': 'colorado',
+    'ct': 'connecticut', 'de': 'delaware', 'dc': 'district of columbia', 'fl': 'florida', 'ga': 'georgia',
+    'hi': 'hawaii', 'id': 'idaho', 'il': 'illinois', 'in': 'indiana', 'ia': 'iowa', 'ks': 'kansas',
+    'ky': 'kentucky', 'la': 'louisiana', 'me': 'maine', 'md': 'maryland', 'ma': 'massachusetts',
+    'mi': 'michigan', 'mn': 'minnesota', 'ms': 'mississippi', 'mo': 'missouri', 'mt': 'montana',
+    'ne': 'nebraska', 'nv': 'nevada', 'nh': 'new hampshire', 'nj': 'new jersey', 'nm': 'new mexico',
+    'ny': 'new york', 'nc': 'north carolina', 'nd': 'north dakota', 'oh': 'ohio', 'ok': 'oklahoma',
+    'or': 'oregon', 'pa': 'pennsylvania', 'ri': 'rhode island', 'sc': 'south carolina', 'sd': 'south dakota',
+    'tn': 'tennessee', 'tx': 'texas', 'ut': 'utah', 'vt': 'vermont', 'va': 'virginia', 'wa': 'washington',
+    'wv': 'west virginia', 'wi': 'wisconsin', 'wy': 'wyoming',
+}
+
+# Normalized phrase -> canonical form. Two texts with the same canonical form are the same answer.
+SYNONYMS = {
+    **{phrase: 'yes' for phrase in ('yes', 'y', 'true', 'i do', 'i am', 'i have', 'i agree')},
+    **{phrase: 'no' for phrase in ('no', 'n', 'false', 'i do not', 'i don t', 'i am not', 'i have not', 'none')},
+    **{phrase: 'united states' for phrase in (
+        'us', 'u s', 'usa', 'u s a', 'united states', 'united states of america', 'america',
+    )},
+    **{phrase: 'united kingdom' for phrase in ('uk', 'u k', 'united kingdom', 'great britain', 'gb', 'britain')},
+    **{phrase: 'united arab emirates' for phrase in ('uae', 'united arab emirates')},
+    **{phrase: 'south korea' for phrase in ('south korea', 'korea republic of', 'republic of korea')},
+    **{phrase: 'male' for phrase in ('male', 'man', 'm')},
+    **{phrase: 'female' for phrase in ('female', 'woman', 'f')},
+}
+US_STATE_NAMES = set(US_STATES.values())
+
+# Options that decline to answer ("I don't wish to answer") are never picked for a yes/no answer.
+DECLINE_PATTERN = re.compile(
+    r'\b(decline|prefer not|wish to|want to answer|rather not|choose not|not to (answer|say|disclose|self identify))\b'
+)
+NEGATIVE_PATTERN = re.compile(r'\b(no|not|none|never|don t|do not|have not|haven t|am not|without)\b')
+PLACEHOLDER_PATTERN = re.compile(r'^(select|choose|please select|pick)\b')
+
+
+def canonical(text, us_states: bool = False) -> str:
+    """
+    :param us_states: Also expand two-letter US state codes. They clash with country codes
+        (CA is Canada, IN is India), so only for option lists made of US states.
+    """
+    normalized = normalize_text(text)
+    if us_states and normalized in US_STATES:
+        return US_STATES[normalized]
+    return SYNONYMS.get(normalized, normalized)
+
+
+def is_us_state_list(pairs) -> bool:
+    """Whether most non-placeholder options are US states, by name or by two-letter code in their text."""
+    texts = [normalize_text(text or value) for value, text in pairs]
+    texts = [text for text in texts if text and not PLACEHOLDER_PATTERN.match(text)]
+    states = sum(text in US_STATE_NAMES or text in US_STATES for text in texts)
+    return states * 2 > len(texts)
+
+
+def fuzzy_option_score(normalized_answer: str, option_text) -> float:
+    """
+    Fuzzy score of an option, or 0.0 when it cannot be the same answer however alike the characters are
+    ('Dec 2025' and 'Dec 2024', 'Level 2' and 'Level 1'): see html_handler.texts_compatible.
+    """
+    normalized_option = normalize_text(option_text)
+    if not texts_compatible(normalized_answer, normalized_option):
+        return 0.0
+    return fuzzy_text_score(normalized_answer, normalized_option)
+
+
+def option_polarity(text) -> str:
+    """
+    Classify an option of a yes/no style question ("I am not a protected veteran",
+    "Yes, I have a disability") as 'yes', 'no', 'decline' or None for placeholders.
+    """
+    normalized = normalize_text(text)
+    if not normalized or PLACEHOLDER_PATTERN.match(normalized):
+        return None
+    if DECLINE_PATTERN.search(normalized):
+        return 'decline'
+    if SYNONYMS.get(normalized) in ('yes', 'no'):
+        return SYNONYMS[normalized]
+    return 'no' if NEGATIVE_PATTERN.search(normalized) else 'yes'
+
+
+def answer_polarity(answer):
+    """
+    :return: 'yes' or 'no' when the answer is a plain yes/no (or a negated sentence), otherwise None.
+    """
+    if canonical(answer) in ('yes', 'no'):
+        return canonical(answer)
+    normalized = normalize_text(answer)
+    return 'no' if normalized and NEGATIVE_PATTERN.search(normalized) and not DECLINE_PATTERN.search(normalized) else None
+
+
+def option_texts(option):
+    """
+    :return: Tuple of (value, text) for an option dict from tags_to_list or a plain option string.
+    """
+    if isinstance(option, dict):
+        return option.get('value'), option.get('text')
+    return option, option
+
+
+def match_option(answer, options):
+    """
+    Match an answer against a list of options without the LLM, trying in order: exact value or text,
+    normalized text, synonym tables (yes/no, countries, US states, gender), yes/no polarity of sentence
+    options (veteran and disability questions) and fuzzy scoring.
+
+    :param answer: The wanted answer, e.g. the select_option_value from the relevance stage.
+    :param options: Option dicts with 'value' and 'text', or plain option strings.
+    :return: Tuple of (option index, score in [0, 1], method name); index is None when nothing matched.
+    """
+    if answer is None or not options:
+        return None, 0.0, 'none'
+    pairs = [option_texts(option) for option in options]
+    for i, (value, text) in enumerate(pairs):
+        if answer in (value, text):
+            return i, 1.0, 'exact'
+    normalized = normalize_text(answer)
+    if not normalized:
+        return None, 0.0, 'none'
+    for i, (value, text) in enumerate(pairs):
+        if normalized in (normalize_text(value), normalize_text(text)):
+            return i, 0.98, 'normalized'
+    us_states = is_us_state_list(pairs)
+    answer_canonical = canonical(answer, us_states)
+    synonyms = [
+        i for i, (value, text) in enumerate(pairs)
+        if answer_canonical in (canonical(value, us_states), canonical(text, us_states))
+    ]
+    if len(synonyms) == 1:
+        return synonyms[0], 0.95, 'synonym'
+    polarity = answer_polarity(answer)
+    if polarity is not None:
+        same_polarity = [i for i, (value, text) in enumerate(pairs) if option_polarity(text or value) == polarity]
+        if len(same_polarity) == 1:
+            return same_polarity[0], 0.9, 'polarity'
+    scores = [max(fuzzy_option_score(normalized, value), fuzzy_option_score(normalized, text)) for value, text in pairs]
+    best = max(range(len(scores)), key=scores.__getitem__)
+    return best, scores[best], 'fuzzy'
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import re
+import threading
+
+import config
+from answer_cache import AnswerCache, context_hash, normalize_text
+
+# Fields run_step_1 adds to each tag; everything else comes from tags_to_list and is re-read from the page.
+PLAN_FIELDS = ('is_relevant_or_required', 'text_value', 'select_option_value', 'general_input_group', 'description')
+
+
+def mask_ids(text: str) -> str:
+    """Replace generated numeric ids (e.g. question_11338566004) so they do not change a fingerprint."""
+    return re.sub(r'\d{3,}', '#', text)
+
+
+def form_fingerprint(tags) -> str:
+    """
+    Fingerprint the structure of a form from its tags_to_list output: tag types, names, labels,
+    option sets and their order. Ids, values and text further away than the field's own label are ignored.
+    """
+    structure = []
+    for tag in tags:
+        label = tag.get('aria-label') or (tag.get('text_above_htmltag') or [''])[-1]
+        structure.append([
+            tag.get('tag_type'),
+            normalize_text(tag.get('type')),
+            mask_ids(normalize_text(tag.get('name'))),
+            normalize_text(label),
+            [normalize_text(option.get('text')) for option in tag.get('select_options') or []],
+        ])
+    return hashlib.sha256(json.dumps(structure).encode('utf-8')).hexdigest()
+
+
+class PlanCache:
+    """
+    Stores the combined tag plan of run_step_1 per (form fingerprint, context hash), so a form
+    with an identical skeleton can be filled again without any LLM call.
+    """
+    def __init__(self, store: AnswerCache):
+        self.store = store
+        self.lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.seconds_saved = 0.0
+
+    def replay(self, tags, context_doc):
+        """
+        :return: The combined tags for `tags` rebuilt from a stored plan, or None on a miss.
+        """
+        plan = self.store.get(form_fingerprint(tags), context_hash(context_doc))
+        with self.lock:
+            self.lookups += 1
+            if plan is not None:
+                self.hits += 1
+                self.seconds_saved += plan['seconds']
+        if plan is None:
+            return None
+        return [
+            {**tag, **fields, 'is_filled': 'no'}
+            for tag, fields in zip(tags, plan['fields'])
+        ]
+
+    def save(self, tags, combined_tags, context_doc, seconds: float):
+        """
+        Store the plan for `tags`.
+        :param seconds: How long the LLM stages took, reported as time saved on later hits.
+        """
+        plan = {
+            'fields': [{field: tag.get(field) for field in PLAN_FIELDS} for tag in combined_tags],
+            'seconds': seconds,
+        }
+        self.store.put(form_fingerprint(tags), plan, context_hash(context_doc))
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'hit_ratio': self.hits / self.lookups if self.lookups else 0.0,
+                'seconds_saved': self.seconds_saved,
+            }
+
+
+_plan_cache = None
+_plan_cache_lock = threading.Lock()
+
+
+def get_plan_cache():
+    """
+    Return the process-wide plan cache, or None when it is disabled.
+    """
+    global _plan_cache
+    if not config.PLAN_CACHE_ENABLED:
+        return None
+    with _plan_cache_lock:
+        if _plan_cache is None:
+            _plan_cache = PlanCache(AnswerCache(
+                config.PLAN_CACHE_PATH,
+                config.PLAN_CACHE_TTL_SECONDS,
+                config.PLAN_CACHE_MAX_ENTRIES,
+                table='plans',
+            ))
+        return _plan_cache
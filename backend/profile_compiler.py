@@ -0,0 +1,189 @@
+import hashlib
+import re
+import threading
+
+EMAIL_PATTERN = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+PHONE_PATTERN = re.compile(r'\+?\(?\d[\d\s().-]{7,}\d')
+# Year-month dates such as 2019.05 or 2021-03, which résumé date ranges string into phone-like runs.
+DATE_LIKE_PATTERN = re.compile(r'(?<!\d)(?:19|20)\d{2}\s*[./-]\s*\d{1,2}(?!\d)')
+# Top-level domains accepted for links written without a scheme or www., so that "Node.js/Express" is no link.
+URL_TLDS = ('com', 'org', 'net', 'io', 'dev', 'me', 'co', 'ai', 'app', 'info', 'edu', 'page', 'site', 'tech')
+# Case-sensitive on purpose: ASP.NET is a framework, not a domain.
+URL_PATTERN = re.compile(
+    r'https?://[^\s,|;]+'
+    r'|(?<![\w@.-])www\.[\w-]+(?:\.[\w-]+)+(?:/[^\s,|;]*)?'
+    r'|(?<![\w@.-])(?:[\w-]+\.)+(?:' + '|'.join(URL_TLDS) + r')(?![\w-])(?:/[^\s,|;]*)?'
+)
+KEY_VALUE_PATTERN = re.compile(r'^\s*([A-Za-z][A-Za-z /-]{1,40}?)\s*[:=]\s*(.+?)\s*$')
+NAME_LINE_PATTERN = re.compile(r"^[A-Z][a-zA-Z'-]+(?: [A-Z][a-zA-Z'.-]*){1,3}$")
+# Title lines that open a document but are no name.
+DOCUMENT_TITLE_PATTERN = re.compile(r'curriculum vitae|r[eé]sum[eé]|cover letter|personal statement', re.I)
+
+# Labels used in "Label: value" lines of the context document, mapped to autocomplete tokens.
+LABEL_TOKENS = {
+    'name': 'name',
+    'full name': 'name',
+    'first name': 'given-name',
+    'given name': 'given-name',
+    'last name': 'family-name',
+    'family name': 'family-name',
+    'surname': 'family-name',
+    'email': 'email',
+    'e-mail': 'email',
+    'email address': 'email',
+    'phone': 'tel',
+    'phone number': 'tel',
+    'mobile': 'tel',
+    'telephone': 'tel',
+    'zip': 'postal-code',
+    'zip code': 'postal-code',
+    'postal code': 'postal-code',
+    'city': 'address-level2',
+    'state': 'address-level1',
+    'country': 'country-name',
+    'address': 'street-address',
+    'linkedin': 'linkedin',
+    'github': 'github',
+    'website': 'url',
+    'portfolio': 'url',
+}
+
+# Autocomplete tokens that are filled with the value of another profile field.
+TOKEN_ALIASES = {
+    'tel-national': 'tel',
+    'address-line1': 'street-address',
+    'country': 'country-name',
+}
+
+# Field name/id patterns for forms that do not set autocomplete; checked in order.
+FIELD_PATTERNS = [
+    ('email', re.compile(r'e[-_ ]?mail')),
+    ('given-name', re.compile(r'first[-_ ]?name|given[-_ ]?name|\bfname\b')),
+    ('family-name', re.compile(r'last[-_ ]?name|family[-_ ]?name|surname|\blname\b')),
+    ('name', re.compile(r'^(full[-_ ]?)?name$')),
+    ('tel', re.compile(r'phone|mobile|\btel\b')),
+    ('linkedin', re.compile(r'linked[-_ ]?in')),
+    ('github', re.compile(r'github')),
+    ('postal-code', re.compile(r'\bzip|postal')),
+    ('url', re.compile(r'website|portfolio')),
+]
+
+# Fields that ask about somebody else and must not get the applicant's details.
+OTHER_PERSON_PATTERN = re.compile(r'emergency|reference|referr|manager|recruiter|spouse')
+
+TEXT_INPUT_TYPES = ('', 'text', 'email', 'tel', 'url', 'search')
+
+# A section heading after which the document describes other people (references, emergency contacts);
+# nothing from there on is the applicant's.
+OTHER_PEOPLE_HEADING_PATTERN = re.compile(
+    r'^[#*\s]*(?:professional |personal |work )?(?:references?|referees?|emergency contacts?|next of kin)\s*:?\s*$',
+    re.I,
+)
+
+
+def applicant_lines(context_doc: str):
+    """
+    :return: The non-blank lines of `context_doc` that describe the applicant: the lines before the first
+        references / emergency contact heading, without "Label: value" lines labelled for another person.
+    """
+    lines = []
+    for line in context_doc.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if OTHER_PEOPLE_HEADING_PATTERN.match(line):
+            break
+        match = KEY_VALUE_PATTERN.match(line)
+        if match and OTHER_PERSON_PATTERN.search(match.group(1).lower()):
+            continue
+        lines.append(line)
+    return lines
+
+
+def compile_profile(context_doc: str) -> dict:
+    """
+    Extract canonical profile values from a free-form context document.
+    :return: Dictionary of autocomplete token (plus `linkedin` and `github`) -> value.
+    """
+    profile = {}
+    lines = applicant_lines(context_doc)
+    text = '\n'.join(lines)
+    for line in lines:
+        match = KEY_VALUE_PATTERN.match(line)
+        if match:
+            token = LABEL_TOKENS.get(' '.join(match.group(1).lower().split()))
+            if token and token not in profile:
+                profile[token] = match.group(2)
+
+    # The first email and phone number of the applicant's part win, labelled or not: a résumé header
+    # usually lists them unlabelled, ahead of any labelled value further down
+    if match := EMAIL_PATTERN.search(text):
+        profile['email'] = match.group(0)
+    for match in PHONE_PATTERN.finditer(text):
+        # Date ranges such as 2020-2023 look like phone numbers but have too few digits,
+        # longer ones such as 2019.05 - 2023.08 have year-month parts
+        number = match.group(0)
+        if 10 <= sum(char.isdigit() for char in number) <= 15 and not DATE_LIKE_PATTERN.search(number):
+            profile['tel'] = number.strip()
+            break
+    for url in URL_PATTERN.findall(text):
+        if '@' in url:
+            continue
+        if 'linkedin.com' in url.lower():
+            profile.setdefault('linkedin', url)
+        elif 'github.com' in url.lower():
+            profile.setdefault('github', url)
+        else:
+            profile.setdefault('url', url)
+    if lines and NAME_LINE_PATTERN.match(lines[0]) and not DOCUMENT_TITLE_PATTERN.search(lines[0]):
+        # Résumés usually open with the applicant's name, which wins over a "Name:" label further down
+        profile['name'] = lines[0]
+    if 'name' in profile:
+        parts = profile['name'].split()
+        if len(parts) > 1:
+            profile.setdefault('given-name', parts[0])
+            profile.setdefault('family-name', parts[-1])
+    elif 'given-name' in profile and 'family-name' in profile:
+        profile['name'] = f"{profile['given-name']} {profile['family-name']}"
+    return profile
+
+
+_profiles = {}
+_profiles_lock = threading.Lock()
+
+
+def get_profile(context_doc: str) -> dict:
+    """
+    Return the compiled profile for `context_doc`, compiling it once per document version.
+    """
+    doc_hash = hashlib.sha256(context_doc.encode('utf-8')).hexdigest()
+    with _profiles_lock:
+        if doc_hash not in _profiles:
+            _profiles.clear()
+            _profiles[doc_hash] = compile_profile(context_doc)
+        return _profiles[doc_hash]
+
+
+def profile_token_for_tag(tag: dict):
+    """
+    Return the profile token a tags_to_list entry asks for, or None if the field is not a standard one.
+    """
+    if tag.get('tag_type') != 'input' or str(tag.get('type') or '').lower() not in TEXT_INPUT_TYPES:
+        return None
+    if str(tag.get('aria-haspopup') or '').lower() in ('true', 'listbox') or tag.get('value'):
+        return None
+
+    autocomplete = str(tag.get('autocomplete') or '').lower().split()
+    if autocomplete and autocomplete[-1] not in ('on', 'off'):
+        return TOKEN_ALIASES.get(autocomplete[-1], autocomplete[-1])
+
+    identifiers = ' '.join(str(tag.get(attr) or '') for attr in ('name', 'id', 'aria-label')).lower().strip()
+    if not identifiers or OTHER_PERSON_PATTERN.search(identifiers):
+        return None
+    for token, pattern in FIELD_PATTERNS:
+        if token == 'name':
+            if pattern.search(str(tag.get('name') or '').lower()):
+                return token
+        elif pattern.search(identifiers):
+            return token
+    return None
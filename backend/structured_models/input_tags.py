@@ -12,7 +12,8 @@ class InputTagDescription(BaseModel):
     #         )
     key: str = Field(description="unique key that should be picked up from the input tag list")
     text_value: Union[None | str] = Field(description="Please fill sensible relevent text here based on your understanding of what the html tag would want. Fill this field with the relevant output and do not keep None. \
-                                                        Only get it from the context document. Verify by summarizing the html tag and its attributes.")
+                                                        Only get it from the context document. Verify by summarizing the html tag and its attributes. \
+                                                        For dropdowns without select_options (e.g. aria-haspopup inputs), give the exact label of the option to pick, as it would be shown in the list.")
     is_filled:  Literal["yes","no"] = Field(description="Ignore this field. Default is no",      default="no",exclude=True)
     select_option_value: Union[None | str] = Field(description="""Look at the description of the tag and select a suitable value from the select_options key.For example if select_options=[ \
     {
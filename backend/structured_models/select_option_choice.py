@@ -0,0 +1,17 @@
+from typing import List, Union
+
+from pydantic import BaseModel, Field
+
+
+class SelectOptionChoice(BaseModel):
+    """The option picked for one select tag."""
+
+    key: str = Field(description="unique key that should be picked up from the provided select tag dictionary")
+    option_value: Union[None | str] = Field(description="The `value` of the option from the tag's select_options that best matches the wanted answer, copied exactly as is.")
+
+
+class SelectOptionChoiceList(BaseModel):
+    """Options picked for a list of select tags"""
+
+    # Creates a model so that we can extract multiple entities.
+    tags: List[SelectOptionChoice]
@@ -0,0 +1,154 @@
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+
+import config
+from metrics import log_event
+
+logger = logging.getLogger(__name__)
+
+TRACE_SUFFIX = '.jsonl.gz'
+
+
+def trace_file_name(work_id) -> str:
+    """Work ids come from the client, so only keep characters that are safe in a file name."""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', str(work_id))[:128] + TRACE_SUFFIX
+
+
+def snapshot(value):
+    """
+    Copy the dicts and lists of a record so the caller can keep mutating them (e.g. marking tags
+    as filled) while the record waits to be written. Leaf values are shared.
+    """
+    if isinstance(value, dict):
+        return {key: snapshot(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [snapshot(item) for item in value]
+    return value
+
+
+class TraceStore:
+    """
+    Appends per-work_id trace records (parsed tags, LLM plans, emitted actions, timings) to gzip-compressed
+    JSONL files in `directory`, one file per work_id. Records are queued and serialized, compressed and
+    written by a background thread, so tracing adds no file I/O to a run; when the queue is full, records
+    are dropped and counted instead of blocking. Files older than `max_age_seconds` are deleted, then the
+    oldest files until the directory holds at most `max_bytes`.
+    """
+    def __init__(self, directory: str, max_bytes: int, max_age_seconds: float, queue_size: int = 10000,
+                 retention_interval_seconds: float = 60.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.retention_interval_seconds = retention_interval_seconds
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.last_retention_at = 0.0
+        os.makedirs(directory, exist_ok=True)
+        self.writer = threading.Thread(target=self._write_loop, name='trace-writer', daemon=True)
+        self.writer.start()
+
+    def record(self, work_id, kind: str, **data):
+        """
+        Queue a trace record for `work_id`; never blocks.
+        :param kind: Type of record, e.g. 'tags', 'plan', 'emit' or 'run'.
+        """
+        try:
+            self.queue.put_nowait({'ts': time.time(), 'work_id': work_id, 'kind': kind, **snapshot(data)})
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+
+    def flush(self):
+        """Block until every queued record is written."""
+        self.queue.join()
+
+    def read(self, work_id):
+        """
+        :return: The trace records of `work_id` in the order they were written, or [] if there are none.
+        """
+        path = os.path.join(self.directory, trace_file_name(work_id))
+        if not os.path.exists(path):
+            return []
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {'written': self.written, 'dropped': self.dropped, 'queued': self.queue.qsize()}
+
+    def _write_loop(self):
+        while True:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+                if time.time() - self.last_retention_at >= self.retention_interval_seconds:
+                    self.apply_retention()
+            except Exception as e:
+                log_event(logger, logging.WARNING, 'trace_write_failed', records=len(batch), error=repr(e))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _write_batch(self, batch):
+        """Write the batch as one gzip member per work_id; gzip readers treat appended members as one stream."""
+        lines_by_work_id = {}
+        for record in batch:
+            lines_by_work_id.setdefault(record['work_id'], []).append(json.dumps(record, default=str))
+        for work_id, lines in lines_by_work_id.items():
+            with gzip.open(os.path.join(self.directory, trace_file_name(work_id)), 'at', encoding='utf-8') as file:
+                file.write('\n'.join(lines) + '\n')
+        with self.lock:
+            self.written += len(batch)
+
+    def apply_retention(self):
+        """Delete trace files past the age limit, then the oldest ones until the size budget holds."""
+        self.last_retention_at = time.time()
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(TRACE_SUFFIX):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        expired_before = time.time() - self.max_age_seconds
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in files:
+            if mtime >= expired_before and total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+
+_trace_store = None
+_trace_store_lock = threading.Lock()
+
+
+def get_trace_store():
+    """
+    Return the process-wide trace store, or None when tracing is disabled.
+    """
+    global _trace_store
+    if not config.TRACE_ENABLED:
+        return None
+    with _trace_store_lock:
+        if _trace_store is None:
+            _trace_store = TraceStore(
+                config.TRACE_DIR,
+                config.TRACE_MAX_BYTES,
+                config.TRACE_MAX_AGE_SECONDS,
+                config.TRACE_QUEUE_SIZE,
+            )
+        return _trace_store
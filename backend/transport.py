@@ -0,0 +1,116 @@
+import json
+import zlib
+
+import config
+from metrics import PAYLOAD_BYTES
+
+# Content codings the server can decode, advertised to clients on connect. The zlib window bits
+# select the container: gzip header and trailer, or the zlib wrapper HTTP calls "deflate".
+ENCODING_WBITS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS,
+}
+READ_CHUNK_BYTES = 64 * 1024
+
+
+class UnsupportedEncoding(ValueError):
+    """The payload uses a content coding the server does not decode."""
+
+
+class PayloadTooLarge(ValueError):
+    """The decompressed payload exceeds config.MAX_DECOMPRESSED_BYTES."""
+
+
+def supported_encodings():
+    return list(ENCODING_WBITS)
+
+
+def iter_chunks(data: bytes, size: int = READ_CHUNK_BYTES):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def decompress_stream(chunks, encoding: str, max_bytes: int = None) -> bytes:
+    """
+    Decompress an iterable of compressed chunks as they arrive, without holding the compressed
+    payload in memory. Output is bounded so a small malicious payload cannot expand without limit.
+
+    :param chunks: Iterable of bytes, e.g. a request stream read in pieces.
+    :param encoding: 'gzip' or 'deflate'.
+    :param max_bytes: Largest decompressed size accepted. Defaults to config.MAX_DECOMPRESSED_BYTES.
+    :raises UnsupportedEncoding: For any other encoding.
+    :raises PayloadTooLarge: When the output would exceed `max_bytes`.
+    :raises ValueError: When the data is not valid for `encoding`.
+    """
+    wbits = ENCODING_WBITS.get((encoding or '').strip().lower())
+    if wbits is None:
+        raise UnsupportedEncoding(f"Unsupported content encoding: {encoding}")
+    max_bytes = config.MAX_DECOMPRESSED_BYTES if max_bytes is None else max_bytes
+    decompressor = zlib.decompressobj(wbits)
+    output = bytearray()
+    try:
+        for chunk in chunks:
+            pending = chunk
+            while pending:
+                output += decompressor.decompress(pending, max_bytes + 1 - len(output))
+                if len(output) > max_bytes:
+                    raise PayloadTooLarge(f"Decompressed payload exceeds {max_bytes} bytes")
+                pending = decompressor.unconsumed_tail
+        output += decompressor.flush()
+    except zlib.error as e:
+        raise ValueError(f"Invalid {encoding} payload: {e}")
+    if len(output) > max_bytes:
+        raise PayloadTooLarge(f"Decompressed payload exceeds {max_bytes} bytes")
+    if not decompressor.eof:
+        raise ValueError(f"Truncated {encoding} payload")
+    return bytes(output)
+
+
+def read_new_work_html(data: dict):
+    """
+    Return the page html of a new_work message. Clients that negotiated compression send it as a
+    binary attachment `renderedHTMLCompressed` with its `encoding`; others send plain `renderedHTML`.
+    :return: The html, or None when the message carries none.
+    """
+    compressed = data.get('renderedHTMLCompressed')
+    if compressed is None:
+        html = data.get('renderedHTML')
+        if html is not None:
+            size = len(html.encode('utf-8'))
+            PAYLOAD_BYTES.inc(size, channel='new_work', encoding='identity', kind='wire')
+            PAYLOAD_BYTES.inc(size, channel='new_work', encoding='identity', kind='decoded')
+        return html
+    if not isinstance(compressed, (bytes, bytearray)):
+        raise ValueError("renderedHTMLCompressed must be a binary attachment")
+    encoding = (data.get('encoding') or '').strip().lower()
+    body = decompress_stream(iter_chunks(bytes(compressed)), encoding)
+    PAYLOAD_BYTES.inc(len(compressed), channel='new_work', encoding=encoding, kind='wire')
+    PAYLOAD_BYTES.inc(len(body), channel='new_work', encoding=encoding, kind='decoded')
+    return body.decode('utf-8')
+
+
+def read_json_body(request):
+    """
+    Parse the JSON body of a Flask request, decompressing it chunk by chunk from the request
+    stream when it carries a Content-Encoding. Uncompressed bodies are parsed as before.
+    """
+    encoding = request.headers.get('Content-Encoding', '').strip().lower()
+    if encoding in ('', 'identity'):
+        data = request.get_json()
+        size = len(request.get_data())
+        PAYLOAD_BYTES.inc(size, channel='select_option', encoding='identity', kind='wire')
+        PAYLOAD_BYTES.inc(size, channel='select_option', encoding='identity', kind='decoded')
+        return data
+    stream = request.stream
+    wire = 0
+
+    def read_chunks():
+        nonlocal wire
+        for chunk in iter(lambda: stream.read(READ_CHUNK_BYTES), b''):
+            wire += len(chunk)
+            yield chunk
+
+    body = decompress_stream(read_chunks(), encoding)
+    PAYLOAD_BYTES.inc(wire, channel='select_option', encoding=encoding, kind='wire')
+    PAYLOAD_BYTES.inc(len(body), channel='select_option', encoding=encoding, kind='decoded')
+    return json.loads(body)
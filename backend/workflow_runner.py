@@ -1,8 +1,79 @@
 from socketio_instance import socketio
-from llm import LLMHandler
+from llm import LLMHandler, order_by_keys, run_coroutine
+from chunk_planner import plan_chunks
+from profile_compiler import get_profile, profile_token_for_tag
+from plan_cache import get_plan_cache
 from html_handler import HTMLHandler
+from trace_store import get_trace_store
 from flask_socketio import emit, send
-import pprint
+import asyncio
+import threading
+import time
+import logging
+import json
+import config
+from metrics import CACHE_LOOKUPS, STAGE_SECONDS, log_event, timed
+
+logger = logging.getLogger(__name__)
+# Bump when the shape of the 'fill_batch' payload changes; the extension checks it.
+FILL_BATCH_VERSION = 1
+
+
+class WorkCancelled(Exception):
+    """Raised inside a running WorkflowRunner once its work has been cancelled."""
+
+
+class CombinedTags:
+    """
+    Merges LLM results into the html tags as they arrive.
+    Summaries and input descriptions can be merged chunk by chunk in any order;
+    `to_list` returns the combined entries in html order.
+    """
+    def __init__(self, html_tags):
+        self.entries = {tag['key']: tag.copy() for tag in html_tags}
+        self.order = [tag['key'] for tag in html_tags]
+        self.summaries = {}
+
+    def merge_descriptions(self, input_descriptions):
+        for desc in input_descriptions:
+            if desc.key in self.entries:
+                self.entries[desc.key].update(desc.__dict__)
+                # Summaries take precedence over input descriptions, whichever arrives first
+                if desc.key in self.summaries:
+                    self.entries[desc.key].update(self.summaries[desc.key].__dict__)
+
+    def merge_summaries(self, summarized_descriptions):
+        for desc in summarized_descriptions:
+            if desc.key in self.entries:
+                self.summaries[desc.key] = desc
+                self.entries[desc.key].update(desc.__dict__)
+
+    def to_list(self):
+        return [self.entries[key] for key in self.order]
+
+
+def css_string(value: str) -> str:
+    """
+    Quote `value` as a CSS string for an attribute selector. Quotes and backslashes are escaped,
+    control characters such as newlines become hex escapes, so any page text yields a valid selector.
+    """
+    escaped = []
+    for char in value:
+        if char in '"\\':
+            escaped.append('\\' + char)
+        elif char < ' ' or char == '\x7f':
+            escaped.append(f'\\{ord(char):x} ')
+        else:
+            escaped.append(char)
+    return '"' + ''.join(escaped) + '"'
+
+
+def combine_tags_and_descriptions(html_tags, summarized_descriptions, input_descriptions):
+    combined = CombinedTags(html_tags)
+    combined.merge_descriptions(input_descriptions)
+    combined.merge_summaries(summarized_descriptions)
+    return combined.to_list()
+
 
 class WorkflowRunner:
     """Coordinates the workflow pipeline."""
@@ -12,6 +83,16 @@ class WorkflowRunner:
         self.html_handler = None
         self.results = {}
         self.context = None
+        self.dom_lock = threading.Lock()
+        self.plan = None
+        self.running = False
+        # Set while the runner waits in the job scheduler, so the global state does not evict it
+        self.queued = False
+        self.run_started_at = None
+        self.cancel_event = threading.Event()
+        # Called as progress_callback(stage, done, total) while the workflow runs
+        self.progress_callback = None
+        self.trace_store = get_trace_store()
     
     def set_context_from_file(self, file_path: str) -> str:
         """
@@ -31,112 +112,388 @@ class WorkflowRunner:
             raise IOError(f"An error occurred while reading the file: {e}")
 
     def run_step_1(self):
+        start = time.perf_counter()
         tags = self.html_handler.tags_to_list()
-        summarized_tags = LLMHandler().summarize_tags(tags)
-        structured_input_tag_list = LLMHandler().evaluate_input_relevance(self.context,summarized_tags)
+        self._record_timing('tags_to_list', start)
+        self._trace('tags', tags=tags)
+        plan_cache = get_plan_cache()
+        if plan_cache is not None:
+            replayed = plan_cache.replay(tags, self.context)
+            stats = plan_cache.stats()
+            self.results['plan_cache_hit'] = replayed is not None
+            CACHE_LOOKUPS.inc(cache='plan', result='hit' if replayed is not None else 'miss')
+            log_event(logger, logging.INFO, 'plan_cache', work_id=self.work_id, hit=replayed is not None, **stats)
+            if replayed is not None:
+                return replayed
+        start = time.perf_counter()
+        combined = self._run_llm_stages(tags)
+        self._record_timing('llm_stages', start)
+        if plan_cache is not None:
+            # A plan with unanswered chunks would be replayed for every later visit of the form
+            if self.results.get('failed_chunks') or self.results.get('empty_chunks'):
+                log_event(logger, logging.INFO, 'plan_cache_skip_save', work_id=self.work_id,
+                          failed_chunks=self.results.get('failed_chunks', 0), empty_chunks=self.results.get('empty_chunks', 0))
+            else:
+                plan_cache.save(tags, combined, self.context, time.perf_counter() - start)
+        return combined
+
+    def _run_llm_stages(self, tags):
+        relevance_tags = self._run_profile_fast_path(tags)
+        if config.PIPELINED_STEP_1:
+            return run_coroutine(self._arun_step_1_pipelined(tags, relevance_tags))
+        rule_summaries, llm_tags = self._classify_with_rules(relevance_tags)
+        llm_handler = LLMHandler()
+        summarized_tags = order_by_keys(relevance_tags, rule_summaries + (llm_handler.summarize_tags(llm_tags) if llm_tags else []))
+        structured_input_tag_list = llm_handler.evaluate_input_relevance(self.context,summarized_tags,html_tags=relevance_tags)
+        self._record_chunk_outcomes(llm_handler)
         # print(structured_input_tag_list)
         # structured_input_tag_list.tags.sort(key=lambda x: x.idx)
-        def combine_tags_and_descriptions(html_tags, summarized_descriptions, input_descriptions):
-            # Create lookup dictionaries for input_descriptions and summarized_descriptions using the `key` field
-            
-            description_lookup = {desc.key: desc for desc in input_descriptions}
-            summary_description_lookup = {desc.key: desc for desc in summarized_descriptions}
+        tags = combine_tags_and_descriptions(tags,summarized_tags,structured_input_tag_list)
+        return tags
 
-            # Combine data
-            combined = []
-            for tag in html_tags:
-                key = tag['key']
-                # Initialize the combined entry with the base tag data
-                combined_entry = tag.copy()
+    async def _arun_step_1_pipelined(self, tags, relevance_tags):
+        """
+        Runs both LLM stages chunk by chunk: each chunk enters the relevance stage
+        as soon as its own summary returns, so no chunk waits on another chunk's summary.
+        Runs on the shared LLM event loop, so blocking work (socket emits) is done on worker threads,
+        and once the work is cancelled the remaining chunks are cancelled with it.
 
-                # Add input description if available
-                if key in description_lookup:
-                    combined_entry.update(description_lookup[key].__dict__)
+        :param tags: All tags of the page.
+        :param relevance_tags: The subset of `tags` that still needs the LLM.
+        """
+        llm_handler = LLMHandler()
+        semaphore = asyncio.Semaphore(llm_handler.max_concurrency)
+        combined = CombinedTags(tags)
+        chunks = plan_chunks(relevance_tags)
+        chunks_done = 0
 
-                # Add summarized description if available
-                if key in summary_description_lookup:
-                    combined_entry.update(summary_description_lookup[key].__dict__)
+        async def run_chunk(chunk):
+            nonlocal chunks_done
+            self._check_cancelled()
+            try:
+                rule_summaries, llm_tags = self._classify_with_rules(chunk)
+                if llm_tags:
+                    rule_summaries += await llm_handler.asummarize_tags_chunk(llm_tags, semaphore)
+                summarized_tags = order_by_keys(chunk, rule_summaries)
+                combined.merge_summaries(summarized_tags)
+                self._check_cancelled()
+                input_descriptions = await llm_handler.aevaluate_input_relevance_chunk(
+                    self.context, summarized_tags, semaphore, html_tags=chunk
+                )
+            except WorkCancelled:
+                raise
+            except Exception as e:
+                # The gateway already retried; leave this chunk's tags unfilled and keep the others
+                log_event(logger, logging.WARNING, 'chunk_failed', work_id=self.work_id, num_tags=len(chunk), error=repr(e))
+                self.results['failed_chunks'] = self.results.get('failed_chunks', 0) + 1
+                return
+            combined.merge_descriptions(input_descriptions)
+            if config.STREAM_FILLS:
+                await asyncio.to_thread(self._emit_page_fills, [combined.entries[tag['key']] for tag in chunk])
+            chunks_done += 1
+            await asyncio.to_thread(self._report_progress, 'planning', chunks_done, len(chunks))
 
-                combined.append(combined_entry)
+        tasks = [asyncio.create_task(run_chunk(chunk)) for chunk in chunks]
+        try:
+            await asyncio.gather(*tasks)
+        except WorkCancelled:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        self._record_chunk_outcomes(llm_handler)
+        return combined.to_list()
 
-            return combined
+    def _record_chunk_outcomes(self, llm_handler):
+        """Add the chunk cost reports and the failed and empty chunk counts of `llm_handler` to the results."""
+        self.results.setdefault('chunk_reports', []).extend(llm_handler.chunk_reports)
+        if llm_handler.failed_chunks:
+            self.results['failed_chunks'] = self.results.get('failed_chunks', 0) + llm_handler.failed_chunks
+        if llm_handler.empty_chunks:
+            self.results['empty_chunks'] = self.results.get('empty_chunks', 0) + llm_handler.empty_chunks
 
-        tags = combine_tags_and_descriptions(tags,summarized_tags,structured_input_tag_list)
-        return tags
+    def _run_profile_fast_path(self, tags):
+        """
+        Fills fields carrying a standard autocomplete token (or an equivalent name/id) straight
+        from the profile compiled from the context document, before any LLM call starts.
+        :return: The tags that still need the LLM.
+        """
+        if not config.PROFILE_FAST_PATH_ENABLED:
+            return tags
+        profile = get_profile(self.context)
+        profile_tags, llm_tags = [], []
+        for tag in tags:
+            token = profile_token_for_tag(tag)
+            if profile.get(token) is None:
+                llm_tags.append(tag)
+                continue
+            tag.update({
+                'is_relevant_or_required': 'yes',
+                'text_value': profile[token],
+                'is_filled': 'no',
+                'select_option_value': None,
+                'general_input_group': 'input text',
+                'description': f"Standard {token} field filled from the profile",
+            })
+            profile_tags.append(tag)
+        self._emit_fill_text_inputs(profile_tags)
+        self.results['profile_fast_path_fills'] = len(profile_tags)
+        log_event(logger, logging.INFO, 'profile_fast_path', work_id=self.work_id, filled=len(profile_tags), tags=len(tags))
+        return llm_tags
+
+    def _classify_with_rules(self, tags):
+        """
+        Summarize unambiguous tags from their attributes and count the LLM summaries avoided.
+        :return: Tuple of (rule-based InputTagSummary list, tags that still need the LLM).
+        """
+        rule_summaries, llm_tags = self.html_handler.classify_tags(tags, config.RULE_CLASSIFIER_MIN_CONFIDENCE)
+        self.results['llm_summaries_avoided'] = self.results.get('llm_summaries_avoided', 0) + len(rule_summaries)
+        log_event(logger, logging.DEBUG, 'rule_classifier', summarized=len(rule_summaries), tags=len(tags))
+        return rule_summaries, llm_tags
     
+    def cancel(self):
+        """
+        Ask the running workflow to stop; it raises WorkCancelled at its next checkpoint and sends no further fills.
+        """
+        self.cancel_event.set()
+
+    def _check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise WorkCancelled(self.work_id)
+
+    def _report_progress(self, stage, done=None, total=None):
+        if self.progress_callback is not None:
+            self.progress_callback(stage, done, total)
+
+    def _emit_fill(self, event, payload):
+        """
+        Emits a fill event and records time-to-first-fill and time-to-last-fill for the current run.
+        """
+        self._check_cancelled()
+        socketio.emit(event, payload)
+        self._trace('emit', event=event, payload=payload)
+        if self.run_started_at is None:
+            return
+        elapsed = time.perf_counter() - self.run_started_at
+        self.results.setdefault('time_to_first_fill', elapsed)
+        self.results['time_to_last_fill'] = elapsed
+
+    def _page_fill_actions(self, tags):
+        """
+        Collects the text, radio and checkbox fills of `tags` in DOM order and marks them as filled.
+        These only touch the page, so they can be sent before the rest of the plan is known.
+        """
+        actions = []
+        for tag in sorted(tags, key=lambda tag: tag.get('idx', 0)):
+            actions += [
+                {'type': 'fill_text_input', 'selector': selector, 'value': value}
+                for selector, value in self._get_relevant_inputs_text([tag])
+            ]
+            actions += [{'type': 'fill_radio_btn', 'selector': selector} for selector in self._get_relevant_radiobtns([tag])]
+            actions += [{'type': 'fill_checkbox', 'selector': selector} for selector in self._get_relevant_checkbox([tag])]
+        return actions
+
+    @timed(STAGE_SECONDS, stage='emit_stream')
+    def _emit_page_fills(self, tags):
+        """
+        Emits the text, radio and checkbox fills of a resolved chunk right away,
+        as one 'fill_batch' event or as per-field events depending on config.FILL_BATCH_ENABLED.
+        """
+        actions = self._page_fill_actions(tags)
+        if not actions:
+            return
+        log_event(logger, logging.DEBUG, 'stream_fills', work_id=self.work_id, actions=actions)
+        if config.FILL_BATCH_ENABLED:
+            self._emit_fill('fill_batch', {'version': FILL_BATCH_VERSION, 'work_id': self.work_id, 'actions': actions})
+            return
+        for action in actions:
+            self._emit_fill(action['type'], {'work_id': self.work_id, **{k: v for k, v in action.items() if k != 'type'}})
+
+    @timed(STAGE_SECONDS, stage='emit_text_inputs')
     def _emit_fill_text_inputs(self, tags):
         """
         Handles emitting the 'fill_text_input' event for relevant text inputs.
         """
         autofill_texts = self._get_relevant_inputs_text(tags)
         for selector, value in autofill_texts:
-            print("Fill text input: emitting,", selector, value)
-            socketio.emit("fill_text_input", {"work_id": self.work_id, "selector": selector, "value": value})
+            log_event(logger, logging.DEBUG, 'fill_text_input', selector=selector, value=value)
+            self._emit_fill("fill_text_input", {"work_id": self.work_id, "selector": selector, "value": value})
     
+    @timed(STAGE_SECONDS, stage='emit_checkboxes')
     def _emit_fill_checkboxes(self, tags):
         """
         Handles emitting the 'fill_checkbox' event for relevant checkboxes.
         """
         autofill_checkbox = self._get_relevant_checkbox(tags)
         for selector in autofill_checkbox:
-            print("Fill checkbox: emitting,", selector)
-            socketio.emit("fill_checkbox", {"work_id": self.work_id, "selector": selector})
+            log_event(logger, logging.DEBUG, 'fill_checkbox', selector=selector)
+            self._emit_fill("fill_checkbox", {"work_id": self.work_id, "selector": selector})
         
+    @timed(STAGE_SECONDS, stage='emit_radiobtns')
     def _emit_fill_radiobtns(self, tags):
 
         autofill_radiobtns = self._get_relevant_radiobtns(tags)
         for selector in autofill_radiobtns:
-            print("Fill radio: emitting,", selector)
-            socketio.emit("fill_radio_btn", {"work_id": self.work_id, "selector": selector})
+            log_event(logger, logging.DEBUG, 'fill_radio_btn', selector=selector)
+            self._emit_fill("fill_radio_btn", {"work_id": self.work_id, "selector": selector})
     
+    @timed(STAGE_SECONDS, stage='emit_dropdowns')
     def _emit_fill_dropdowns(self,tags):
-        for tag in tags:
-            if (
-                'dropdown' in str(tag.get('general_input_group', '') or '') and 
-                'yes' in (tag.get('is_relevant_or_required', '') or '').lower() and
-                (tag.get('is_filled', '') or '').lower() == 'no' and
-                'select' not in str(tag.get('tag_type', '') or '')
-            ):
-                tag['is_filled']="yes"
-                selector = self._css_selector(tag)
-                print("Fill dropdown: emitting,", selector)
-                socketio.emit('click_dropdown_and_select', {'work_id':self.work_id,'tag':tag})
+        for tag in self._get_relevant_dropdowns(tags):
+            selector = self._css_selector(tag)
+            log_event(logger, logging.DEBUG, 'click_dropdown_and_select', selector=selector)
+            self._emit_fill('click_dropdown_and_select', {'work_id':self.work_id,'tag':tag,'option_label':self._dropdown_option_label(tag)})
     
+    @timed(STAGE_SECONDS, stage='emit_select_dropdowns')
     def _emit_fill_select_dropdown(self,tags):
-        for tag in tags:
-            general_input_group = tag.get('general_input_group', '')
-            if (
-                ('dropdown' in str(general_input_group or '') or 'select' in str(general_input_group or '')) and
-                'yes' in (tag.get('is_relevant_or_required', '') or '').lower() and
-                tag.get('select_option_value') is not None and
-                (tag.get('is_filled', '') or '').lower() == 'no' and
-                'select' in str(tag.get('tag_type', '') or '')
-            ):
-                option_value = LLMHandler().choose_option(tag.get('select_option_value'),tag.get('select_options'),"In the list of options, select the value which seems most likely.So if \"vaue\":\"Male\" is most likely, return Male.")
-                tag['select_option_value'] = option_value
-                tag['is_filled']="yes"
-                selector = self._css_selector(tag)
-                print("Fill dropdown: emitting,", tag)
-                socketio.emit('select_option', {'work_id':self.work_id,'tag':tag})
+        for tag in self._get_relevant_select_dropdowns(tags):
+            log_event(logger, logging.DEBUG, 'select_option', key=tag['key'], value=tag.get('select_option_value'))
+            self._emit_fill('select_option', {'work_id':self.work_id,'tag':tag})
+
+    @timed(STAGE_SECONDS, stage='emit_batch')
+    def _emit_fill_batch(self, tags):
+        """
+        Emits every fill as one 'fill_batch' event: an ordered list of typed actions with precomputed selectors.
+        Fields are picked exactly as the per-field emitters pick them. Actions that only touch the page come
+        first; custom dropdowns, which need a round trip to the server, come last.
+        """
+        dropdowns = self._get_relevant_dropdowns(tags)
+        actions = [
+            {'type': 'fill_text_input', 'selector': selector, 'value': value}
+            for selector, value in self._get_relevant_inputs_text(tags)
+        ]
+        actions += [{'type': 'fill_radio_btn', 'selector': selector} for selector in self._get_relevant_radiobtns(tags)]
+        actions += [{'type': 'fill_checkbox', 'selector': selector} for selector in self._get_relevant_checkbox(tags)]
+        actions += [
+            {'type': 'select_option', 'selector': self._css_selector(tag), 'tag': tag}
+            for tag in self._get_relevant_select_dropdowns(tags)
+        ]
+        actions += [
+            {'type': 'click_dropdown_and_select', 'selector': self._css_selector(tag), 'tag': tag,
+             'option_label': self._dropdown_option_label(tag)}
+            for tag in dropdowns
+        ]
+        if not actions:
+            return
+        log_event(logger, logging.DEBUG, 'fill_batch', work_id=self.work_id, actions=actions)
+        self._emit_fill('fill_batch', {'version': FILL_BATCH_VERSION, 'work_id': self.work_id, 'actions': actions})
 
     def run(self):
+        self.running = True
+        self.queued = False
+        status = 'failed'
+        try:
+            self._run_workflow()
+            status = 'done'
+        except WorkCancelled:
+            status = 'cancelled'
+            raise
+        finally:
+            self.running = False
+            self._trace('run', status=status, results=self.results)
+            self.compact()
+
+    def _run_workflow(self):
+        self.run_started_at = time.perf_counter()
+        self._report_progress('parsing')
+        start = time.perf_counter()
         self.html_handler = HTMLHandler(self.rendered_html)
+        self._record_timing('parse', start)
+        self._check_cancelled()
+        self._report_progress('planning')
         tags = self.run_step_1()
-        pprint.pprint(tags)
-        import json
-        with open('output.json', 'w') as file:
-            json.dump(tags, file, indent=4)
-
+        self.plan = tags
+        self._check_cancelled()
+        self._report_progress('filling')
+        log_event(logger, logging.DEBUG, 'plan', work_id=self.work_id, tags=tags)
+        self._trace('plan', tags=tags)
 
+        start = time.perf_counter()
+        if config.FILL_BATCH_ENABLED:
+            self._emit_fill_batch(tags)
+            self._record_timing('emit', start)
+            self._report_fill_times()
+            return
         self._emit_fill_dropdowns(tags)
         self._emit_fill_text_inputs(tags)
-        with open('output.json', 'w') as file:
-            json.dump(tags, file, indent=4)
         self._emit_fill_radiobtns(tags)
         self._emit_fill_checkboxes(tags)
         self._emit_fill_select_dropdown(tags)
+        self._record_timing('emit', start)
         # tags = [dict1]
-        
+        self._report_fill_times()
+
+    def _trace(self, kind, **data):
+        """Hand a trace record to the background trace store, when tracing is enabled."""
+        if self.trace_store is not None:
+            self.trace_store.record(self.work_id, kind, **data)
+
+    def _record_timing(self, stage, start):
+        elapsed = time.perf_counter() - start
+        self.results.setdefault('timings', {})[stage] = elapsed
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+
+    def _report_fill_times(self):
+        if 'time_to_first_fill' in self.results:
+            log_event(logger, logging.INFO, 'fill_timing', work_id=self.work_id,
+                      time_to_first_fill=self.results['time_to_first_fill'],
+                      time_to_last_fill=self.results['time_to_last_fill'])
+
+    def compact(self):
+        """
+        Drop the raw html and the parsed page once the run is over, keeping only the context and the tag plan.
+        Later option lookups start a new session DOM from the subtrees the extension sends.
+        """
+        with self.dom_lock:
+            self.rendered_html = None
+            self.html_handler = None
+
+    def approximate_size(self) -> int:
+        """
+        :return: Estimated memory held by this runner, in bytes.
+        """
+        with self.dom_lock:
+            size = len(self.rendered_html or '') + len(self.context or '')
+            if self.html_handler is not None:
+                size += self.html_handler.approximate_size()
+        if self.plan is not None:
+            size += len(json.dumps(self.plan, default=str))
+        return size
+
+    def apply_dom_update(self, new_subtree: str = None, new_html: str = None):
+        """
+        Bring the session DOM up to date after the page changed, e.g. when a dropdown opened.
+        :param new_subtree: outerHTML of only the newly appeared subtree, or an HTMLHandler that already
+            parsed it, merged into the session DOM.
+        :param new_html: The full page html, which replaces the session DOM.
+        :return: The HTMLHandler holding the updated session DOM.
+        """
+        with self.dom_lock:
+            if new_html is not None:
+                self.html_handler = HTMLHandler(new_html)
+            elif new_subtree is not None:
+                if self.html_handler is None:
+                    self.html_handler = new_subtree if isinstance(new_subtree, HTMLHandler) else HTMLHandler(new_subtree)
+                else:
+                    self.html_handler.merge_subtree(new_subtree)
+            return self.html_handler
+
+    def find_option_element(self, option_text: str, new_subtree: str = None, new_html: str = None):
+        """
+        Update the session DOM and find the element showing `option_text`.
+        The new subtree is searched first, since it holds the options that just appeared.
+        :return: Dictionary describing the element (see HTMLHandler.get_element_with_text), or None.
+        """
+        element = None
+        if new_subtree is not None:
+            # Parsed once: searched here, then its elements are moved into the session DOM
+            new_subtree = HTMLHandler(new_subtree, body_only=False)
+            element = new_subtree.get_element_with_text(option_text)
+        session_html_handler = self.apply_dom_update(new_subtree=new_subtree, new_html=new_html)
+        if element is not None:
+            return element
+        with self.dom_lock:
+            return session_html_handler.get_element_with_text(option_text)
 
     def get_results(self):
         return self.results
@@ -163,6 +520,58 @@ class WorkflowRunner:
                     item["is_filled"] = "yes"
             return results
     
+    def _get_relevant_dropdowns(self, input_list):
+            """
+            Extracts custom (non-<select>) dropdowns that should be opened and have an option picked.
+
+            :param input_list: List of dictionaries representing inputs.
+            :return: List of tag dictionaries.
+            """
+            results = []
+            for tag in input_list:
+                if (
+                    'dropdown' in str(tag.get('general_input_group', '') or '') and 
+                    'yes' in (tag.get('is_relevant_or_required', '') or '').lower() and
+                    (tag.get('is_filled', '') or '').lower() == 'no' and
+                    'select' not in str(tag.get('tag_type', '') or '')
+                ):
+                    tag['is_filled']="yes"
+                    results.append(tag)
+            return results
+
+    def _get_relevant_select_dropdowns(self, input_list):
+            """
+            Extracts native <select> tags to fill and resolves the option value to select for each.
+
+            :param input_list: List of dictionaries representing inputs.
+            :return: List of tag dictionaries with `select_option_value` set to the chosen option value.
+            """
+            results = []
+            for tag in input_list:
+                general_input_group = tag.get('general_input_group', '')
+                if (
+                    ('dropdown' in str(general_input_group or '') or 'select' in str(general_input_group or '')) and
+                    'yes' in (tag.get('is_relevant_or_required', '') or '').lower() and
+                    tag.get('select_option_value') is not None and
+                    (tag.get('is_filled', '') or '').lower() == 'no' and
+                    'select' in str(tag.get('tag_type', '') or '')
+                ):
+                    results.append(tag)
+            # All pending selects are resolved together instead of one round trip each
+            option_values = LLMHandler().choose_select_options(results,"In the list of options, select the value which seems most likely.So if \"vaue\":\"Male\" is most likely, return Male.")
+            for tag in results:
+                tag['select_option_value'] = option_values[tag['key']]
+                tag['is_filled']="yes"
+            return results
+
+    def _dropdown_option_label(self, tag):
+        """
+        The label of the option the relevance stage intends for a custom dropdown, which the extension
+        clicks directly; None makes it fall back to /api/select_option.
+        """
+        label = tag.get('text_value')
+        return (label.strip() or None) if isinstance(label, str) else None
+
     def _get_relevant_checkbox(self,input_list):
             """
             Extracts a tuple of CSS selectors and text_value for relevant inputs.
@@ -193,7 +602,8 @@ class WorkflowRunner:
                         ('radio' in str(item.get('general_input_group', '') or '')) or 
                         ('radio' in str(item.get('tag_type', '') or ''))
                     ) and 
-                    str(item.get('is_relevant_or_required', '') or '').lower() == 'yes'
+                    str(item.get('is_relevant_or_required', '') or '').lower() == 'yes' and
+                    str(item.get('is_filled', '') or '').lower() != 'yes'
                 ):
                     results.append(self._css_selector(item))
                     item["is_filled"] = "yes"
@@ -213,7 +623,7 @@ class WorkflowRunner:
                     attr_value = ' '.join(attr_value)  # You can change the separator if needed
                 
                 # Append the attribute to the selector
-                selector_parts.append(f'[{attr}="{attr_value}"]')
+                selector_parts.append(f'[{attr}={css_string(str(attr_value))}]')
         
         # Join parts to form the full selector
         css_selector = ''.join(selector_parts)
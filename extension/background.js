@@ -16,6 +16,26 @@ let server_url = "http://127.0.0.1:5001";
 
 let socket = io("http://127.0.0.1:5001", { transports: ["websocket"] });
 
+// Content encodings the server decodes, sent on connect; empty for servers without compression
+let serverEncodings = [];
+// Smaller payloads are sent as plain text, compressing them costs more than it saves
+const COMPRESS_MIN_BYTES = 16 * 1024;
+
+function shouldCompress(size) {
+  return (
+    serverEncodings.includes("gzip") &&
+    typeof CompressionStream !== "undefined" &&
+    size >= COMPRESS_MIN_BYTES
+  );
+}
+
+async function gzipText(text) {
+  const stream = new Blob([text])
+    .stream()
+    .pipeThrough(new CompressionStream("gzip"));
+  return new Uint8Array(await new Response(stream).arrayBuffer());
+}
+
 class GlobalStateManager {
   constructor() {
     this.globalState = {}; // Internal state object
@@ -100,11 +120,18 @@ chrome.runtime.onConnect.addListener((port) => {
             });
             await page.setViewport({ width, height });
 
-            //send html to server and start process
-            socket.emit("new_work", {
-              work_id: work_id,
-              renderedHTML: String(msg.renderedHTML),
-            });
+            //send html to server and start process; large pages go as a gzip binary attachment
+            const renderedHTML = String(msg.renderedHTML);
+            const payload = shouldCompress(renderedHTML.length)
+              ? {
+                  work_id: work_id,
+                  renderedHTMLCompressed: await gzipText(renderedHTML),
+                  encoding: "gzip",
+                }
+              : { work_id: work_id, renderedHTML: renderedHTML };
+            socket.emit("new_work", payload, (ack) =>
+              console.log("new_work acknowledged:", work_id, ack)
+            );
 
             //testing stuff
           } catch (error) {
@@ -143,27 +170,72 @@ socket.on("disconnect", (reason) => {
   console.log("Disconnected from server:", reason);
 });
 
+socket.on("server_capabilities", (data) => {
+  serverEncodings = data.encodings || [];
+  console.log("Server accepts encodings:", serverEncodings);
+});
+
+socket.on("job_status", (data) => {
+  console.log("Job status:", data);
+});
+
+// Stop server-side work for a tab that was closed
+chrome.tabs.onRemoved.addListener((tabid) => {
+  for (const work_id of globalStateManager.listWorkIds()) {
+    if (globalStateManager.getWorkState(work_id).tabid === tabid) {
+      socket.emit("cancel_work", { work_id: work_id });
+      globalStateManager.removeWorkState(work_id);
+    }
+  }
+});
+
+// Report a fill the compat listeners could not apply, in the same shape as a failed batch action
+function reportFillFailure(type, data, error) {
+  console.error(`Fill action ${type} failed:`, error);
+  const selector = data.selector ?? (data.tag ? cssSelector(data.tag) : undefined);
+  socket.emit("fill_batch_result", {
+    work_id: data.work_id,
+    failed: [{ type, selector, error: String(error?.message ?? error) }],
+  });
+}
+
 socket.on("fill_text_input", (data) => {
-  queue.add(async () => await handleFillTextInput(data));
+  queue
+    .add(async () => await handleFillTextInput(data))
+    .catch((error) => reportFillFailure("fill_text_input", data, error));
 });
 
 socket.on("fill_checkbox", (data) => {
-  queue.add(async () => await handleFillCheckBox(data));
+  queue
+    .add(async () => await handleFillCheckBox(data))
+    .catch((error) => reportFillFailure("fill_checkbox", data, error));
 });
 
 socket.on("fill_radio_btn", (data) => {
-  queue.add(async () => await handleRadioButton(data));
+  queue
+    .add(async () => await handleRadioButton(data))
+    .catch((error) => reportFillFailure("fill_radio_btn", data, error));
+});
+
+socket.on("fill_batch", (data) => {
+  queue
+    .add(async () => await handleFillBatch(data))
+    .catch((error) => reportFillFailure("fill_batch", data, error));
 });
 
 socket.on("click", (data) => {
   console.log("Clicking", data);
-  queue.add(async () => await scrollAndClickElement(data));
+  queue
+    .add(async () => await scrollAndClickElement(data))
+    .catch((error) => reportFillFailure("click", data, error));
 });
 
 socket.on("end-process", (data) => {
   const jsonData = typeof data === "string" ? JSON.parse(data) : data;
   let port = globalStateManager.getWorkState(jsonData.work_id).port;
-  queue.add(() => sendMessageToPopup(port));
+  queue
+    .add(() => sendMessageToPopup(port))
+    .catch((error) => console.error("Error notifying the popup:", error));
 });
 
 // background.js
@@ -177,63 +249,188 @@ function sendMessageToPopup(port) {
 
 socket.on("click_dropdown_and_select", (data) => {
   const jsonData = typeof data === "string" ? JSON.parse(data) : data;
-  queue.add(async () => {
-    let tabid = globalStateManager.getWorkState(jsonData.work_id).tabid;
-    const linesOld = await getLinesOfTextPromise(tabid);
-    let selector = cssSelector(jsonData.tag);
-    console.log("selector");
-    console.log(selector);
-    await scrollAndClickElement(jsonData, selector);
-    console.log("scrolling done.");
-    // await delay(1000);
-    const linesNew = await getLinesOfTextPromise(tabid);
-    const htmlNew = await getLatestHtmlPromise(tabid);
-    let new_options = findNewLines(linesOld, linesNew);
-    console.log(new_options);
+  queue
+    .add(async () => await handleClickDropdownAndSelect(jsonData))
+    .catch((error) => reportFillFailure("click_dropdown_and_select", jsonData, error));
+});
+
+async function handleClickDropdownAndSelect(jsonData) {
+  // The server resolved the option label during the main pipeline: open the
+  // dropdown and click the matching option without a round trip
+  if (jsonData.option_label) {
+    let page = globalStateManager.getWorkState(jsonData.work_id).page;
+    const triggerSelector = cssSelector(jsonData.tag);
+    const seenMarker = "data-aplora-seen";
     try {
-      const response = await fetch("http://127.0.0.1:5001/api/select_option", {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({
-          options: new_options,
-          work_id: jsonData.work_id,
-          description: jsonData.tag["description"],
-          newHtml: htmlNew,
-        }),
-      });
-      const result = await response.json();
-      if (result === "unsuccessful") return;
-      console.log("Response from Python:", result);
-      let option_selector = cssSelector(result.element_to_select);
-      console.log("selector");
-      console.log(option_selector);
-      await scrollAndClickElement(jsonData, option_selector);
-      console.log("Option selected");
-      // await delay(2000);
+      await markVisibleListboxes(page, seenMarker);
+      await scrollAndClickElement(jsonData, triggerSelector);
+      if (await clickOptionWithLabel(page, triggerSelector, jsonData.option_label, seenMarker)) {
+        console.log("Option selected by label:", jsonData.option_label);
+        return;
+      }
+      // Close the menu again so the fallback below sees the options appear
+      await page.keyboard.press("Escape");
     } catch (error) {
-      console.error("Error sending request to Python:", error);
+      console.error("Error selecting option by label:", error);
+    } finally {
+      await page
+        .evaluate((marker) => {
+          for (const element of document.querySelectorAll(`[${marker}]`)) element.removeAttribute(marker);
+        }, seenMarker)
+        .catch(() => {});
     }
-  });
-});
+    console.log("No option matches label, asking the server:", jsonData.option_label);
+  }
+  let tabid = globalStateManager.getWorkState(jsonData.work_id).tabid;
+  const linesOld = await getLinesOfTextPromise(tabid);
+  let selector = cssSelector(jsonData.tag);
+  console.log("selector");
+  console.log(selector);
+  await scrollAndClickElement(jsonData, selector);
+  console.log("scrolling done.");
+  // await delay(1000);
+  const linesNew = await getLinesOfTextPromise(tabid);
+  let new_options = findNewLines(linesOld, linesNew);
+  console.log(new_options);
+  // Send only the subtree holding the new options; fall back to the full page
+  const subtreeNew = await getSubtreeContainingPromise(tabid, new_options);
+  const domUpdate = subtreeNew
+    ? { newSubtree: subtreeNew }
+    : { newHtml: await getLatestHtmlPromise(tabid) };
+  try {
+    const body = JSON.stringify({
+      options: new_options,
+      work_id: jsonData.work_id,
+      description: jsonData.tag["description"],
+      answer: jsonData.tag["text_value"],
+      ...domUpdate,
+    });
+    const compress = shouldCompress(body.length);
+    const response = await fetch("http://127.0.0.1:5001/api/select_option", {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        ...(compress ? { "Content-Encoding": "gzip" } : {}),
+      },
+      body: compress ? await gzipText(body) : body,
+    });
+    const result = await response.json();
+    if (result === "unsuccessful") return;
+    console.log("Response from Python:", result);
+    let option_selector = cssSelector(result.element_to_select);
+    console.log("selector");
+    console.log(option_selector);
+    await scrollAndClickElement(jsonData, option_selector);
+    console.log("Option selected");
+    // await delay(2000);
+  } catch (error) {
+    console.error("Error sending request to Python:", error);
+    throw error;
+  }
+}
 
 socket.on("select_option", (data) => {
   const jsonData = typeof data === "string" ? JSON.parse(data) : data;
-  queue.add(async () => {
-    console.log(data);
-    let selector = cssSelector(jsonData.tag);
-    console.log("selector");
-    console.log(selector);
-    await handleSelectOptionByValue(data.work_id, data.tag, selector);
-  });
+  queue
+    .add(async () => {
+      console.log(data);
+      let selector = cssSelector(jsonData.tag);
+      console.log("selector");
+      console.log(selector);
+      await handleSelectOptionByValue(jsonData.work_id, jsonData.tag, selector);
+    })
+    .catch((error) => reportFillFailure("select_option", jsonData, error));
 });
 
+// Mark the listboxes visible before a dropdown is opened, so the one it opens can be told apart
+async function markVisibleListboxes(page, marker) {
+  await page.evaluate((marker) => {
+    for (const listbox of document.querySelectorAll('[role="listbox"]')) {
+      if (listbox.offsetParent !== null) listbox.setAttribute(marker, "1");
+    }
+  }, marker);
+}
+
+// Wait briefly for an option whose text matches `label` inside the listbox opened
+// by `triggerSelector` and click it. Only that listbox is searched: the one the
+// trigger names with aria-controls / aria-owns, otherwise a listbox that became
+// visible after the click. A "Yes" elsewhere on the page is never clicked.
+async function clickOptionWithLabel(page, triggerSelector, label, seenMarker, timeout = 1000) {
+  const marker = "data-aplora-option";
+  try {
+    await page.waitForFunction(
+      (triggerSelector, label, marker, seenMarker) => {
+        const normalize = (text) =>
+          (text || "")
+            .toLowerCase()
+            .replace(/[^\w\s]/g, " ")
+            .split(/\s+/)
+            .filter(Boolean)
+            .join(" ");
+        const visible = (element) => element.offsetParent !== null;
+        const trigger = document.querySelector(triggerSelector);
+        const owner = trigger?.closest("[aria-controls], [aria-owns]");
+        const ids = [owner?.getAttribute("aria-controls"), owner?.getAttribute("aria-owns")]
+          .filter(Boolean)
+          .join(" ")
+          .split(/\s+/)
+          .filter(Boolean);
+        let scopes = ids.map((id) => document.getElementById(id)).filter((element) => element && visible(element));
+        if (!scopes.length) {
+          scopes = [...document.querySelectorAll('[role="listbox"]')].filter(
+            (listbox) => visible(listbox) && !listbox.hasAttribute(seenMarker)
+          );
+        }
+        const wanted = normalize(label);
+        // Real options first, then option-looking elements of custom widgets
+        for (const selector of ['[role="option"]', '[role="menuitem"], [class*="option"], li']) {
+          for (const scope of scopes) {
+            for (const element of scope.querySelectorAll(selector)) {
+              if (visible(element) && normalize(element.textContent) === wanted) {
+                element.setAttribute(marker, "1");
+                return true;
+              }
+            }
+          }
+        }
+        return false;
+      },
+      { timeout },
+      triggerSelector,
+      label,
+      marker,
+      seenMarker
+    );
+  } catch (error) {
+    return false; // no match appeared in time
+  }
+  const selector = `[${marker}="1"]`;
+  await page.click(selector);
+  await page.evaluate(
+    (selector, marker) => document.querySelector(selector)?.removeAttribute(marker),
+    selector,
+    marker
+  );
+  return true;
+}
+
 function findNewLines(oldLines, newLines) {
   const oldSet = new Set(oldLines);
   return newLines.filter((line) => !oldSet.has(line));
 }
 
+// Quote a value as a CSS string for an attribute selector. CSS.escape is not
+// available in the service worker; quoting only needs quotes, backslashes and
+// control characters escaped (same as css_string on the server).
+function cssString(value) {
+  const escaped = value.replace(/["\\]|[\x00-\x1f\x7f]/g, (char) =>
+    char === '"' || char === "\\"
+      ? "\\" + char
+      : "\\" + char.charCodeAt(0).toString(16) + " "
+  );
+  return `"${escaped}"`;
+}
+
 function cssSelector(tag) {
   const tagType = tag.tag_type || "input";
   const selectorParts = [tagType];
@@ -267,7 +464,7 @@ function cssSelector(tag) {
       }
 
       // Append the attribute to the selector
-      selectorParts.push(`[${attr}="${attrValue}"]`);
+      selectorParts.push(`[${attr}=${cssString(String(attrValue))}]`);
     }
   }
 
@@ -303,6 +500,60 @@ function getLatestHtml(tabId, callback) {
   );
 }
 
+// ////////////////////Get subtree holding new text//////////////////////
+function getSubtreeContainingPromise(tabId, lines) {
+  return new Promise((resolve) => {
+    if (!lines || lines.length === 0) {
+      resolve(null);
+      return;
+    }
+    chrome.scripting.executeScript(
+      {
+        target: { tabId: tabId },
+        function: extractSubtreeContaining,
+        args: [lines],
+      },
+      (results) => {
+        if (chrome.runtime.lastError) {
+          console.error("Error extracting subtree:", chrome.runtime.lastError);
+          resolve(null);
+          return;
+        }
+        resolve(results[0].result);
+      }
+    );
+  });
+}
+
+// Function to be injected into the page: outerHTML of the smallest element
+// containing every text node whose trimmed text is in `lines`
+function extractSubtreeContaining(lines) {
+  const wanted = new Set(lines);
+  const walker = document.createTreeWalker(
+    document.body,
+    NodeFilter.SHOW_TEXT,
+    null,
+    false
+  );
+  let common = null;
+  let node;
+  while ((node = walker.nextNode())) {
+    if (!wanted.has(node.textContent.trim())) continue;
+    const element = node.parentElement;
+    if (!common) {
+      common = element;
+    } else {
+      while (common && !common.contains(element)) {
+        common = common.parentElement;
+      }
+    }
+  }
+  if (!common || common === document.body || common === document.documentElement) {
+    return null;
+  }
+  return common.outerHTML;
+}
+
 // ////////////////////Get Latest lines of text//////////////////////
 function getLinesOfTextPromise(tabId) {
   return new Promise((resolve) => {
@@ -467,6 +718,7 @@ async function handleFillTextInput(data) {
     // await page.type(jsonData.selector, String(jsonData.value));
   } catch (error) {
     console.error("Error processing data:", error);
+    throw error;
   }
 }
 
@@ -498,6 +750,7 @@ async function handleFillCheckBox(data) {
     }
   } catch (error) {
     console.error("Error processing data:", error);
+    throw error;
   }
 }
 
@@ -511,6 +764,99 @@ async function handleRadioButton(data) {
     await scrollAndClickElement(jsonData, radioBtnSelector);
   } catch (error) {
     console.error("Error processing data:", error);
+    throw error;
+  }
+}
+
+// Version of the 'fill_batch' payload this executor understands
+const FILL_BATCH_VERSION = 1;
+
+async function handleFillBatch(data) {
+  try {
+    const jsonData = typeof data === "string" ? JSON.parse(data) : data;
+    if (jsonData.version !== FILL_BATCH_VERSION) {
+      console.error("Unsupported fill_batch version:", jsonData.version);
+      return;
+    }
+    const work_id = jsonData.work_id;
+    console.log("Executing fill batch: ", jsonData.actions.length, "actions");
+    let page = globalStateManager.getWorkState(work_id).page;
+
+    // Fill every text input present on the page in a single round trip. Each action is
+    // guarded on its own so one invalid selector cannot abort the rest of the batch.
+    const textActions = jsonData.actions.filter(
+      (action) => action.type === "fill_text_input"
+    );
+    const { missing, failed } = await page.evaluate((actions) => {
+      const notFound = [];
+      const errors = [];
+      for (const action of actions) {
+        try {
+          const input = document.querySelector(action.selector);
+          if (input) {
+            input.value = action.value;
+          } else {
+            notFound.push(action);
+          }
+        } catch (error) {
+          errors.push({ type: action.type, selector: action.selector, error: String(error) });
+        }
+      }
+      return { missing: notFound, failed: errors };
+    }, textActions);
+
+    for (const action of missing) {
+      await runFillAction(failed, action, () =>
+        handleFillTextInput({ work_id, ...action })
+      );
+    }
+    for (const action of jsonData.actions) {
+      switch (action.type) {
+        case "fill_text_input":
+          break; // handled above
+        case "fill_checkbox":
+          await runFillAction(failed, action, () =>
+            handleFillCheckBox({ work_id, selector: action.selector })
+          );
+          break;
+        case "fill_radio_btn":
+          await runFillAction(failed, action, () =>
+            handleRadioButton({ work_id, selector: action.selector })
+          );
+          break;
+        case "select_option":
+          await runFillAction(failed, action, () =>
+            handleSelectOptionByValue(work_id, action.tag, action.selector)
+          );
+          break;
+        case "click_dropdown_and_select":
+          await runFillAction(failed, action, () =>
+            handleClickDropdownAndSelect({
+              work_id,
+              tag: action.tag,
+              option_label: action.option_label,
+            })
+          );
+          break;
+        default:
+          failed.push({ type: action.type, selector: action.selector, error: "Unknown action type" });
+      }
+    }
+    if (failed.length) {
+      console.error("Fill batch actions failed:", failed);
+      socket.emit("fill_batch_result", { work_id, failed });
+    }
+  } catch (error) {
+    console.error("Error processing fill batch:", error);
+  }
+}
+
+// Run one fill action, recording it in `failed` instead of letting its error end the batch
+async function runFillAction(failed, action, run) {
+  try {
+    await run();
+  } catch (error) {
+    failed.push({ type: action.type, selector: action.selector, error: String(error) });
   }
 }
 
@@ -535,6 +881,7 @@ async function handleSelectOptionByValue(work_id, tag, selectSelector) {
     console.log(`Option selected. Selected value(s): ${selectedValues}`);
   } catch (error) {
     console.error("Error while selecting option:", error);
+    throw error;
   }
 }
 